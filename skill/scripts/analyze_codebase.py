@@ -4,20 +4,43 @@
 Scans a project directory and outputs a JSON structure with:
 - Top-level modules/packages (potential C4 systems or containers)
 - Entry points and services (APIs, servers, workers)
-- Dependencies (from package.json, requirements.txt, go.mod, etc.)
+- Dependencies from every manifest in the tree (package.json, requirements*.txt,
+  pyproject.toml, setup.py, go.mod, Cargo.toml, pom.xml, build.gradle,
+  composer.json, Gemfile), attributed to the module that owns them
 - Connections between modules (imports/requires across boundaries)
 
 Usage:
-    python analyze_codebase.py <project_path> [--depth 2] [--output json|summary]
+    python analyze_codebase.py <project_path> [--depth 2] [--output json|compact|summary] [--gzip] [--max-nodes N]
+
+    # Keep the index hot and publish every update:
+    python analyze_codebase.py <project_path> --watch [--output-file analysis.json] [--socket /tmp/analysis.sock]
+    python analyze_codebase.py --socket /tmp/analysis.sock      # query a running watcher
+
+    # Large cold trees: answer within a budget, refine on each rerun:
+    python analyze_codebase.py <project_path> --time-budget 30 [--max-files 5000]
+
+    # Several repositories, analyzed in parallel and merged into one landscape:
+    python analyze_codebase.py <repo> <repo> ... [--jobs 8]
+    python analyze_codebase.py --repos repos.txt [--name "Acme"]
+
+    # Trace one feature through the persistent symbol index:
+    python analyze_codebase.py <project_path> --topic "payment flow" [--output summary]
+
+Importable API (keeps the file index and manifest parses between calls):
+
+    from analyze_codebase import Analyzer
+
+    analyzer = Analyzer()
+    for path in paths:
+        result = analyzer.analyze(path)      # -> Analysis
+        data = result.to_dict()              # same structure as the CLI JSON
 """
 from __future__ import annotations
 
-import json
 import os
-import re
 import sys
+from bisect import bisect_left
 from pathlib import Path
-from collections import defaultdict
 
 IGNORE_DIRS = {
     "node_modules", ".git", "__pycache__", ".venv", "venv", "env",
@@ -27,357 +50,1256 @@ IGNORE_DIRS = {
 
 IGNORE_FILES = {".DS_Store", "Thumbs.db", ".gitignore", ".env"}
 
+CODE_EXTENSIONS = {
+    ".ts", ".js", ".py", ".go", ".rs", ".java", ".cs", ".rb", ".php",
+    ".tsx", ".jsx", ".vue", ".svelte",
+}
 
-def detect_project_type(path: Path) -> list[str]:
-    """Detect project type(s) from manifest files."""
-    types = []
-    markers = {
-        "package.json": "node",
-        "requirements.txt": "python",
-        "pyproject.toml": "python",
-        "setup.py": "python",
-        "go.mod": "go",
-        "Cargo.toml": "rust",
-        "pom.xml": "java",
-        "build.gradle": "java",
-        "Gemfile": "ruby",
-        "composer.json": "php",
-        "*.csproj": "dotnet",
-        "*.sln": "dotnet",
-    }
-    for marker, ptype in markers.items():
-        if "*" in marker:
-            if list(path.glob(marker)):
-                types.append(ptype)
-        elif (path / marker).exists():
-            types.append(ptype)
-    return list(set(types)) or ["unknown"]
+IMPORT_SCAN_EXTENSIONS = {".ts", ".js", ".py", ".go", ".tsx", ".jsx"}
 
+CONNECTION_EXAMPLES = 5
 
-def parse_package_json(path: Path) -> dict:
-    """Extract info from package.json."""
-    try:
-        with open(path / "package.json") as f:
-            pkg = json.load(f)
-        return {
-            "name": pkg.get("name", ""),
-            "description": pkg.get("description", ""),
-            "dependencies": list(pkg.get("dependencies", {}).keys()),
-            "devDependencies": list(pkg.get("devDependencies", {}).keys()),
-            "scripts": list(pkg.get("scripts", {}).keys()),
-            "main": pkg.get("main", ""),
-        }
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {}
+# Budgeted runs persist per-file import matches here and resume from them.
+SCAN_STATE_VERSION = 1
+SCAN_STATE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "architecture-diagram-skill" / "imports"
 
+SRC_DIRS = ["src", "lib", "pkg", "packages", "apps", "services", "internal", "cmd"]
 
-def parse_requirements(path: Path) -> list[str]:
-    """Extract dependencies from requirements.txt."""
-    req_file = path / "requirements.txt"
-    if not req_file.exists():
-        return []
-    deps = []
-    for line in req_file.read_text().splitlines():
-        line = line.strip()
-        if line and not line.startswith("#") and not line.startswith("-"):
-            name = re.split(r"[>=<!\[]", line)[0].strip()
-            if name:
-                deps.append(name)
-    return deps
-
-
-def parse_pyproject(path: Path) -> dict:
-    """Extract basic info from pyproject.toml."""
-    toml_file = path / "pyproject.toml"
-    if not toml_file.exists():
-        return {}
-    content = toml_file.read_text()
-    info = {}
-    name_match = re.search(r'name\s*=\s*"([^"]+)"', content)
-    if name_match:
-        info["name"] = name_match.group(1)
-    desc_match = re.search(r'description\s*=\s*"([^"]+)"', content)
-    if desc_match:
-        info["description"] = desc_match.group(1)
-    return info
-
-
-def find_entry_points(path: Path, project_types: list[str]) -> list[dict]:
-    """Find likely service entry points."""
-    entries = []
-    patterns = {
-        "node": [
-            ("server.ts", "API server"),
-            ("server.js", "API server"),
-            ("index.ts", "Entry point"),
-            ("index.js", "Entry point"),
-            ("app.ts", "Application"),
-            ("app.js", "Application"),
-            ("main.ts", "Main entry"),
-            ("main.js", "Main entry"),
-            ("worker.ts", "Background worker"),
-            ("worker.js", "Background worker"),
-        ],
-        "python": [
-            ("main.py", "Main entry"),
-            ("app.py", "Application"),
-            ("manage.py", "Django management"),
-            ("wsgi.py", "WSGI server"),
-            ("asgi.py", "ASGI server"),
-            ("celery.py", "Task worker"),
-        ],
-        "go": [("main.go", "Main entry")],
-        "dotnet": [("Program.cs", "Main entry"), ("Startup.cs", "App startup")],
-    }
+PROJECT_MARKERS = {
+    "package.json": "node",
+    "requirements.txt": "python",
+    "pyproject.toml": "python",
+    "setup.py": "python",
+    "go.mod": "go",
+    "Cargo.toml": "rust",
+    "pom.xml": "java",
+    "build.gradle": "java",
+    "Gemfile": "ruby",
+    "composer.json": "php",
+    "*.csproj": "dotnet",
+    "*.sln": "dotnet",
+}
 
-    for ptype in project_types:
-        for filename, role in patterns.get(ptype, []):
-            for found in path.rglob(filename):
-                rel = found.relative_to(path)
-                if not any(p in IGNORE_DIRS for p in rel.parts):
-                    entries.append({
-                        "file": str(rel),
-                        "role": role,
-                        "directory": str(rel.parent) if str(rel.parent) != "." else "root",
-                    })
-    return entries
-
-
-def find_top_level_modules(path: Path, max_depth: int = 2) -> list[dict]:
-    """Identify top-level modules/packages as potential C4 containers."""
-    modules = []
-    src_dirs = ["src", "lib", "pkg", "packages", "apps", "services", "internal", "cmd"]
-
-    # Check for monorepo-style structure
-    for src_dir in src_dirs:
-        src_path = path / src_dir
-        if src_path.is_dir():
-            for child in sorted(src_path.iterdir()):
-                if child.is_dir() and child.name not in IGNORE_DIRS:
-                    mod = analyze_module(child, path)
-                    if mod:
-                        modules.append(mod)
+ENTRY_POINT_PATTERNS = {
+    "node": [
+        ("server.ts", "API server"),
+        ("server.js", "API server"),
+        ("index.ts", "Entry point"),
+        ("index.js", "Entry point"),
+        ("app.ts", "Application"),
+        ("app.js", "Application"),
+        ("main.ts", "Main entry"),
+        ("main.js", "Main entry"),
+        ("worker.ts", "Background worker"),
+        ("worker.js", "Background worker"),
+    ],
+    "python": [
+        ("main.py", "Main entry"),
+        ("app.py", "Application"),
+        ("manage.py", "Django management"),
+        ("wsgi.py", "WSGI server"),
+        ("asgi.py", "ASGI server"),
+        ("celery.py", "Task worker"),
+    ],
+    "go": [("main.go", "Main entry")],
+    "dotnet": [("Program.cs", "Main entry"), ("Startup.cs", "App startup")],
+}
 
-    # If no src dirs found, use top-level directories
-    if not modules:
-        for child in sorted(path.iterdir()):
-            if child.is_dir() and child.name not in IGNORE_DIRS and not child.name.startswith("."):
-                mod = analyze_module(child, path)
-                if mod:
-                    modules.append(mod)
+MODULE_TYPE_HINTS = {
+    "api": "API service",
+    "server": "server",
+    "web": "web application",
+    "frontend": "frontend",
+    "backend": "backend service",
+    "worker": "background worker",
+    "queue": "message queue consumer",
+    "db": "database layer",
+    "database": "database layer",
+    "gateway": "API gateway",
+    "auth": "authentication service",
+    "common": "shared library",
+    "shared": "shared library",
+    "lib": "library",
+    "utils": "utilities",
+    "config": "configuration",
+    "models": "data models",
+    "services": "service layer",
+    "controllers": "controller layer",
+    "routes": "routing layer",
+}
 
-    return modules
+# ---------------------------------------------------------------------------
+# Records
+# ---------------------------------------------------------------------------
 
+class Record:
+    """Base for slotted result records; to_dict() yields the CLI JSON shape.
 
-def analyze_module(mod_path: Path, root: Path) -> dict | None:
-    """Analyze a single module directory."""
-    files = list(mod_path.rglob("*"))
-    code_files = [f for f in files if f.is_file() and f.suffix in {
-        ".ts", ".js", ".py", ".go", ".rs", ".java", ".cs", ".rb", ".php",
-        ".tsx", ".jsx", ".vue", ".svelte",
-    } and not any(p in IGNORE_DIRS for p in f.relative_to(root).parts)]
+    A trailing underscore on a slot name (``from_``) is dropped in the dict key.
+    """
 
-    if not code_files:
-        return None
+    __slots__ = ()
 
-    extensions = defaultdict(int)
-    for f in code_files:
-        extensions[f.suffix] += 1
-
-    # Detect type hints
-    component_type = "module"
-    rel_path = str(mod_path.relative_to(root))
-
-    type_hints = {
-        "api": "API service",
-        "server": "server",
-        "web": "web application",
-        "frontend": "frontend",
-        "backend": "backend service",
-        "worker": "background worker",
-        "queue": "message queue consumer",
-        "db": "database layer",
-        "database": "database layer",
-        "gateway": "API gateway",
-        "auth": "authentication service",
-        "common": "shared library",
-        "shared": "shared library",
-        "lib": "library",
-        "utils": "utilities",
-        "config": "configuration",
-        "models": "data models",
-        "services": "service layer",
-        "controllers": "controller layer",
-        "routes": "routing layer",
-    }
+    def __init__(self, *args, **kwargs):
+        for name, value in zip(self.__slots__, args):
+            setattr(self, name, value)
+        for name, value in kwargs.items():
+            setattr(self, name, value)
 
-    name = mod_path.name.lower()
-    for hint, ctype in type_hints.items():
-        if hint in name:
-            component_type = ctype
-            break
+    def to_dict(self) -> dict:
+        return {name.rstrip("_"): _plain(getattr(self, name)) for name in self.__slots__}
 
-    has_package_json = (mod_path / "package.json").exists()
-    has_dockerfile = (mod_path / "Dockerfile").exists()
+    def __eq__(self, other):
+        return type(self) is type(other) and all(
+            getattr(self, n) == getattr(other, n) for n in self.__slots__
+        )
+
+    def __repr__(self):
+        fields = ", ".join(f"{n}={getattr(self, n)!r}" for n in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+def _plain(value):
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, list):
+        return [_plain(v) for v in value]
+    return value
 
-    return {
-        "name": mod_path.name,
-        "path": rel_path,
-        "type": component_type,
-        "file_count": len(code_files),
-        "languages": dict(sorted(extensions.items(), key=lambda x: -x[1])),
-        "has_own_manifest": has_package_json or (mod_path / "pyproject.toml").exists(),
-        "has_dockerfile": has_dockerfile,
-        "is_deployable": has_dockerfile or has_package_json,
-    }
 
+class ProjectInfo(Record):
+    __slots__ = ("path", "name", "description", "types")
+    path: str
+    name: str
+    description: str
+    types: list[str]
 
-def find_cross_module_imports(path: Path, modules: list[dict]) -> list[dict]:
-    """Find import relationships between top-level modules."""
-    connections = []
-    module_names = {m["name"] for m in modules}
 
-    for mod in modules:
-        mod_path = path / mod["path"]
-        for code_file in mod_path.rglob("*"):
-            if not code_file.is_file():
+class Module(Record):
+    __slots__ = (
+        "name", "path", "type", "file_count", "languages",
+        "has_own_manifest", "has_dockerfile", "is_deployable",
+    )
+    name: str
+    path: str
+    type: str
+    file_count: int
+    languages: dict[str, int]
+    has_own_manifest: bool
+    has_dockerfile: bool
+    is_deployable: bool
+
+
+class EntryPoint(Record):
+    __slots__ = ("file", "role", "directory")
+    file: str
+    role: str
+    directory: str
+
+
+class Connection(Record):
+    """Aggregated imports from one module to another.
+
+    ``imports`` counts import statements, ``files`` distinct importing files,
+    and ``examples`` lists up to CONNECTION_EXAMPLES of those files (all of
+    them when the analyzer runs with ``connection_files=True``).
+    """
+
+    __slots__ = ("from_", "to", "imports", "files", "examples")
+    from_: str
+    to: str
+    imports: int
+    files: int
+    examples: list[str]
+
+
+class Technology(Record):
+    __slots__ = ("name", "technology_type", "suggested_c4_type", "modules", "sources")
+    name: str
+    technology_type: str
+    suggested_c4_type: str
+    modules: list[str]
+    sources: list[str]
+
+
+class Manifest(Record):
+    __slots__ = ("path", "ecosystem", "name", "module", "dependencies", "dev_dependencies")
+    path: str
+    ecosystem: str
+    name: str
+    module: str | None
+    dependencies: list[str]
+    dev_dependencies: list[str]
+
+
+class Analysis(Record):
+    """Combined result. ``coverage`` is None for a complete run and describes
+    the sampled import scan when a time or file budget cut it short."""
+
+    __slots__ = (
+        "project", "modules", "entry_points", "connections", "technologies",
+        "dependencies", "manifests", "coverage",
+    )
+    project: ProjectInfo
+    modules: list[Module]
+    entry_points: list[EntryPoint]
+    connections: list[Connection]
+    technologies: list[Technology]
+    dependencies: dict[str, list[str]]
+    manifests: list[Manifest]
+    coverage: dict | None
+
+
+# ---------------------------------------------------------------------------
+# File index
+# ---------------------------------------------------------------------------
+
+class FileIndex:
+    """Relative file and directory listing of a tree, built in one walk.
+
+    Paths are POSIX-style strings relative to ``root``. ``files`` is sorted so
+    everything below a directory is one contiguous slice.
+    """
+
+    __slots__ = ("root", "files", "dirs", "by_name")
+
+    def __init__(self, root: Path, files: list[str], dirs: set[str]):
+        self.root = root
+        self.files = files
+        self.dirs = dirs
+        self.by_name: dict[str, list[str]] = {}
+        for rel in files:
+            self.by_name.setdefault(rel.rpartition("/")[2], []).append(rel)
+
+    @classmethod
+    def build(cls, root: Path) -> FileIndex:
+        files: list[str] = []
+        dirs: set[str] = set()
+        stack = [("", str(root))]
+        while stack:
+            rel_dir, abs_dir = stack.pop()
+            try:
+                entries = os.scandir(abs_dir)
+            except OSError:
                 continue
-            if code_file.suffix not in {".ts", ".js", ".py", ".go", ".tsx", ".jsx"}:
+            with entries:
+                for entry in entries:
+                    rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in IGNORE_DIRS:
+                                dirs.add(rel)
+                                stack.append((rel, entry.path))
+                        elif entry.is_file():
+                            files.append(rel)
+                    except OSError:
+                        continue
+        files.sort()
+        return cls(root, files, dirs)
+
+    def subindex(self, rel_dir: str) -> FileIndex:
+        """Index of a subdirectory, re-rooted, without touching the disk."""
+        prefix = rel_dir + "/"
+        files = [f[len(prefix):] for f in self.under(rel_dir)]
+        dirs = {d[len(prefix):] for d in self.dirs if d.startswith(prefix)}
+        return FileIndex(self.root / rel_dir, files, dirs)
+
+    def under(self, rel_dir: str) -> list[str]:
+        """All indexed files below rel_dir (relative to the index root)."""
+        if not rel_dir:
+            return self.files
+        prefix = rel_dir + "/"
+        start = bisect_left(self.files, prefix)
+        end = bisect_left(self.files, prefix + "\U0010ffff")
+        return self.files[start:end]
+
+    def children(self, rel_dir: str = "") -> list[str]:
+        """Immediate child directory names of rel_dir, sorted."""
+        depth = rel_dir.count("/") + 1 if rel_dir else 0
+        prefix = rel_dir + "/" if rel_dir else ""
+        return sorted(
+            d[len(prefix):] for d in self.dirs
+            if d.startswith(prefix) and d.count("/") == depth
+        )
+
+    def has_file(self, rel: str) -> bool:
+        i = bisect_left(self.files, rel)
+        return i < len(self.files) and self.files[i] == rel
+
+    def rescan_dir(self, rel_dir: str):
+        """Re-read one directory's entries; walk only new subdirectories."""
+        prefix = rel_dir + "/" if rel_dir else ""
+        old_files = {f for f in self.under(rel_dir) if "/" not in f[len(prefix):]}
+        old_dirs = set(self.children(rel_dir))
+        new_files: set[str] = set()
+        new_dirs: set[str] = set()
+        try:
+            with os.scandir(self.root / rel_dir) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in IGNORE_DIRS:
+                                new_dirs.add(entry.name)
+                        elif entry.is_file():
+                            new_files.add(prefix + entry.name)
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+
+        files = set(self.files)
+        files.difference_update(old_files - new_files)
+        files.update(new_files)
+        for name in old_dirs - new_dirs:
+            gone = prefix + name
+            files.difference_update(self.under(gone))
+            self.dirs = {d for d in self.dirs if d != gone and not d.startswith(gone + "/")}
+        for name in new_dirs - old_dirs:
+            sub = FileIndex.build(self.root / rel_dir / name)
+            added = prefix + name
+            self.dirs.add(added)
+            self.dirs.update(f"{added}/{d}" for d in sub.dirs)
+            files.update(f"{added}/{f}" for f in sub.files)
+
+        self.files = sorted(files)
+        self.by_name = {}
+        for rel in self.files:
+            self.by_name.setdefault(rel.rpartition("/")[2], []).append(rel)
+
+
+# ---------------------------------------------------------------------------
+# Analyzer
+# ---------------------------------------------------------------------------
+
+class Analyzer:
+    """Reusable codebase analyzer.
+
+    Keeps file indexes, manifest parses, per-file import matches and module
+    stats between calls, so analyzing many (possibly overlapping) paths in one
+    process walks each tree once. Call ``invalidate()`` after files change on
+    disk, or ``refresh()`` with the changed paths to update incrementally.
+    """
+
+    def __init__(self, rules_file: Path | str | None = None, connection_files: bool = False):
+        self._rules_file = rules_file
+        self._connection_files = connection_files
+        self._rules = None
+        self._indexes: dict[Path, FileIndex] = {}
+        self._manifests: dict[tuple[str, str], tuple[int, int, object]] = {}
+        self._import_patterns: dict[str, object] = {}
+        self._file_imports: dict[str, tuple[int, int, tuple[str, ...], dict[str, int]]] = {}
+        self._modules: dict[tuple[Path, str], Module | None] = {}
+        self._symbol_indexes: dict[Path, object] = {}
+
+    # -- state ------------------------------------------------------------
+
+    def index(self, path: Path | str) -> FileIndex:
+        """Return the file index for path, reusing an enclosing index if any."""
+        path = Path(path).resolve()
+        cached = self._indexes.get(path)
+        if cached is not None:
+            return cached
+        for root, idx in self._indexes.items():
+            try:
+                rel = path.relative_to(root)
+            except ValueError:
                 continue
-            if any(p in IGNORE_DIRS for p in code_file.relative_to(path).parts):
+            if not any(p in IGNORE_DIRS for p in rel.parts):
+                sub = idx.subindex(rel.as_posix())
+                self._indexes[path] = sub
+                return sub
+        idx = FileIndex.build(path)
+        self._indexes[path] = idx
+        return idx
+
+    def invalidate(self, path: Path | str | None = None):
+        """Drop cached indexes (all, or those overlapping path)."""
+        if path is None:
+            self._indexes.clear()
+            return
+        path = Path(path).resolve()
+        for root in list(self._indexes):
+            if root == path or path in root.parents or root in path.parents:
+                del self._indexes[root]
+        for key in [k for k in self._modules if k[0] == path or path in k[0].parents or k[0] in path.parents]:
+            del self._modules[key]
+
+    def refresh(self, path: Path | str, changed: list[str]):
+        """Apply on-disk changes under path's index incrementally.
+
+        ``changed`` lists relative paths: directories are re-scanned (their
+        direct entries only), files drop their cached import matches, and any
+        module containing a changed path is recomputed on the next call.
+        """
+        root = Path(path).resolve()
+        idx = self.index(root)
+        for rel in sorted(set(changed), key=lambda r: r.count("/")):
+            if rel == "" or rel in idx.dirs:
+                idx.rescan_dir(rel)
+            self._file_imports.pop(str(root / rel), None)
+        for key in list(self._modules):
+            mod_root, mod_path = key
+            if mod_root != root:
                 continue
+            if any(rel == mod_path or rel.startswith(mod_path + "/") or mod_path.startswith(rel + "/")
+                   or rel == "" for rel in changed):
+                del self._modules[key]
 
-            try:
-                content = code_file.read_text(errors="ignore")
-            except Exception:
+    def _manifest(self, file: Path, kind: str, parser):
+        """Parse a manifest once per (path, mtime, size)."""
+        try:
+            st = file.stat()
+        except OSError:
+            return None
+        key = (str(file), kind)
+        cached = self._manifests.get(key)
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            return cached[2]
+        try:
+            parsed = parser(file)
+        except Exception as e:  # one unreadable manifest must not abort the analysis
+            print(f"Warning: skipping {file}: {e}", file=sys.stderr)
+            parsed = None
+        self._manifests[key] = (st.st_mtime_ns, st.st_size, parsed)
+        return parsed
+
+    # -- phases -----------------------------------------------------------
+
+    def detect_project_type(self, path: Path | str) -> list[str]:
+        """Detect project type(s) from manifest files."""
+        path = Path(path).resolve()
+        idx = self.index(path)
+        root_files = {f for f in idx.files if "/" not in f}
+        types = []
+        for marker, ptype in PROJECT_MARKERS.items():
+            if "*" in marker:
+                suffix = marker[1:]
+                if any(f.endswith(suffix) for f in root_files):
+                    types.append(ptype)
+            elif marker in root_files:
+                types.append(ptype)
+        return sorted(set(types)) or ["unknown"]
+
+    def parse_package_json(self, path: Path | str) -> dict:
+        """Extract info from package.json."""
+        from manifests import parse_package_json
+        return self._manifest(Path(path).resolve() / "package.json", "node", parse_package_json) or {}
+
+    def parse_requirements(self, path: Path | str) -> list[str]:
+        """Extract dependencies from requirements.txt."""
+        from manifests import parse_requirements
+        return self._manifest(Path(path).resolve() / "requirements.txt", "requirements", parse_requirements) or []
+
+    def parse_pyproject(self, path: Path | str) -> dict:
+        """Extract basic info from pyproject.toml."""
+        from manifests import parse_pyproject
+        return self._manifest(Path(path).resolve() / "pyproject.toml", "python", parse_pyproject) or {}
+
+    def find_manifests(self, path: Path | str, modules: list[Module]) -> list[Manifest]:
+        """Parse every supported manifest in the tree, attributed to its module.
+
+        Manifests outside every module (e.g. the project root) get module None.
+        """
+        from manifests import manifest_kind
+
+        root = Path(path).resolve()
+        idx = self.index(root)
+        owners = sorted(modules, key=lambda m: -len(m.path))
+        found = []
+        for filename in sorted(idx.by_name):
+            kind = manifest_kind(filename)
+            if kind is None:
                 continue
+            ecosystem, parser = kind
+            for rel in idx.by_name[filename]:
+                info = self._manifest(root / rel, ecosystem, parser)
+                if not info:
+                    continue
+                owner = _owner(owners, rel)
+                found.append(Manifest(
+                    path=rel,
+                    ecosystem=ecosystem,
+                    name=info.get("name", ""),
+                    module=owner,
+                    dependencies=info.get("dependencies", []),
+                    dev_dependencies=info.get("devDependencies", []),
+                ))
+        found.sort(key=lambda m: m.path)
+        return found
+
+    def find_entry_points(self, path: Path | str, project_types: list[str]) -> list[EntryPoint]:
+        """Find likely service entry points."""
+        idx = self.index(path)
+        entries = []
+        for ptype in project_types:
+            for filename, role in ENTRY_POINT_PATTERNS.get(ptype, []):
+                for rel in sorted(idx.by_name.get(filename, [])):
+                    parent = rel.rpartition("/")[0]
+                    entries.append(EntryPoint(rel, role, parent or "root"))
+        return entries
 
-            for other_mod in module_names:
-                if other_mod == mod["name"]:
+    def find_top_level_modules(self, path: Path | str, max_depth: int = 2) -> list[Module]:
+        """Identify top-level modules/packages as potential C4 containers."""
+        idx = self.index(path)
+        modules = []
+
+        # Check for monorepo-style structure
+        for src_dir in SRC_DIRS:
+            if src_dir in idx.dirs:
+                for child in idx.children(src_dir):
+                    mod = self.analyze_module(idx, f"{src_dir}/{child}")
+                    if mod:
+                        modules.append(mod)
+
+        # If no src dirs found, use top-level directories
+        if not modules:
+            for child in idx.children():
+                if not child.startswith("."):
+                    mod = self.analyze_module(idx, child)
+                    if mod:
+                        modules.append(mod)
+
+        return modules
+
+    def analyze_module(self, idx: FileIndex, rel_path: str) -> Module | None:
+        """Analyze a single module directory (cached until refreshed)."""
+        key = (idx.root, rel_path)
+        if key not in self._modules:
+            self._modules[key] = self._analyze_module(idx, rel_path)
+        return self._modules[key]
+
+    def _analyze_module(self, idx: FileIndex, rel_path: str) -> Module | None:
+        code_files = [f for f in idx.under(rel_path) if _suffix(f) in CODE_EXTENSIONS]
+        if not code_files:
+            return None
+
+        extensions: dict[str, int] = {}
+        for f in code_files:
+            ext = _suffix(f)
+            extensions[ext] = extensions.get(ext, 0) + 1
+
+        name = rel_path.rpartition("/")[2]
+        component_type = "module"
+        lowered = name.lower()
+        for hint, ctype in MODULE_TYPE_HINTS.items():
+            if hint in lowered:
+                component_type = ctype
+                break
+
+        from manifests import manifest_kind
+
+        has_package_json = idx.has_file(f"{rel_path}/package.json")
+        has_dockerfile = idx.has_file(f"{rel_path}/Dockerfile")
+        prefix = rel_path + "/"
+        has_manifest = any(
+            "/" not in f[len(prefix):] and manifest_kind(f[len(prefix):]) for f in idx.under(rel_path)
+        )
+
+        return Module(
+            name=name,
+            path=rel_path,
+            type=component_type,
+            file_count=len(code_files),
+            languages=dict(sorted(extensions.items(), key=lambda x: -x[1])),
+            has_own_manifest=has_manifest,
+            has_dockerfile=has_dockerfile,
+            is_deployable=has_dockerfile or has_package_json,
+        )
+
+    def find_cross_module_imports(self, path: Path | str, modules: list[Module]) -> list[Connection]:
+        """Find import relationships between top-level modules, one per (from, to) pair."""
+        return self.scan_imports(path, modules)[0]
+
+    def scan_imports(self, path: Path | str, modules: list[Module], deadline: float | None = None,
+                     max_files: int | None = None) -> tuple[list[Connection], dict[str, tuple[int, int]]]:
+        """Scan import-bearing files, optionally within a budget.
+
+        Without limits every file is read. With a deadline (``time.monotonic()``
+        value) or max_files, files are visited in a schedule that samples each
+        module in proportion to its size, so any prefix is a representative
+        sample; files whose cached matches are still fresh cost nothing and do
+        not count against max_files. Returns the connections and
+        {module: (files scanned, files total)}.
+        """
+        import time
+
+        root = Path(path).resolve()
+        idx = self.index(root)
+        names = tuple(sorted({m.name for m in modules}))
+        patterns = {name: self._import_pattern(name) for name in names}
+        limit = None if self._connection_files else CONNECTION_EXAMPLES
+        edges: dict[tuple[str, str], Connection] = {}
+
+        candidates = {
+            mod.name: [rel for rel in idx.under(mod.path) if _suffix(rel) in IMPORT_SCAN_EXTENSIONS]
+            for mod in modules
+        }
+        budgeted = deadline is not None or max_files is not None
+        if budgeted:
+            schedule = _proportional_schedule(candidates)
+        else:
+            schedule = [(name, rel) for name, rels in candidates.items() for rel in rels]
+
+        scanned = dict.fromkeys(candidates, 0)
+        read = 0
+        for name, rel in schedule:
+            file = root / rel
+            matches = self._fresh_import_matches(file, names) if budgeted else None
+            if matches is None:
+                if budgeted and ((max_files is not None and read >= max_files)
+                                 or (deadline is not None and time.monotonic() >= deadline)):
+                    continue
+                matches = self._file_import_matches(file, names, patterns)
+                read += 1
+            scanned[name] += 1
+            for other, count in matches.items():
+                if other == name:
                     continue
-                # Check for imports referencing another module
-                patterns = [
-                    rf'from\s+["\'].*{re.escape(other_mod)}',
-                    rf'import\s+.*["\'].*{re.escape(other_mod)}',
-                    rf'require\(["\'].*{re.escape(other_mod)}',
-                    rf'from\s+{re.escape(other_mod)}\s+import',
-                ]
-                for pat in patterns:
-                    if re.search(pat, content):
-                        conn = {
-                            "from": mod["name"],
-                            "to": other_mod,
-                            "file": str(code_file.relative_to(path)),
-                        }
-                        if conn not in connections:
-                            connections.append(conn)
-                        break
-
-    return connections
-
-
-def detect_technologies(path: Path, pkg_info: dict) -> list[dict]:
-    """Detect key technologies used in the project."""
-    techs = []
-    indicators = {
-        "react": {"type": "framework-library", "c4_type": "app"},
-        "next": {"type": "framework-library", "c4_type": "app"},
-        "vue": {"type": "framework-library", "c4_type": "app"},
-        "angular": {"type": "framework-library", "c4_type": "app"},
-        "express": {"type": "framework-library", "c4_type": "app"},
-        "fastapi": {"type": "framework-library", "c4_type": "app"},
-        "django": {"type": "framework-library", "c4_type": "app"},
-        "flask": {"type": "framework-library", "c4_type": "app"},
-        "postgresql": {"type": "data-storage", "c4_type": "store"},
-        "pg": {"type": "data-storage", "c4_type": "store"},
-        "mongodb": {"type": "data-storage", "c4_type": "store"},
-        "mongoose": {"type": "data-storage", "c4_type": "store"},
-        "redis": {"type": "data-storage", "c4_type": "store"},
-        "mysql": {"type": "data-storage", "c4_type": "store"},
-        "prisma": {"type": "data-storage", "c4_type": "store"},
-        "typeorm": {"type": "data-storage", "c4_type": "store"},
-        "sequelize": {"type": "data-storage", "c4_type": "store"},
-        "rabbitmq": {"type": "message-broker", "c4_type": "app"},
-        "kafka": {"type": "message-broker", "c4_type": "app"},
-        "docker": {"type": "deployment", "c4_type": "system"},
-        "kubernetes": {"type": "deployment", "c4_type": "system"},
+                conn = edges.get((name, other))
+                if conn is None:
+                    conn = edges[(name, other)] = Connection(name, other, 0, 0, [])
+                conn.imports += count
+                conn.files += 1
+                if limit is None or len(conn.examples) < limit:
+                    conn.examples.append(rel)
+
+        totals = {name: (scanned[name], len(rels)) for name, rels in candidates.items()}
+        return [edges[key] for key in sorted(edges)], totals
+
+    def _fresh_import_matches(self, file: Path, names: tuple[str, ...]) -> dict[str, int] | None:
+        """Cached matches for file if still valid, without reading it."""
+        cached = self._file_imports.get(str(file))
+        if not cached or cached[2] != names:
+            return None
+        try:
+            st = os.stat(file)
+        except OSError:
+            return None
+        if cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            return cached[3]
+        return None
+
+    def load_scan_state(self, path: Path | str, state_file: Path | str | None = None):
+        """Load import matches persisted by save_scan_state() (budgeted runs resume from them)."""
+        import json
+
+        root = Path(path).resolve()
+        try:
+            with open(state_file or _scan_state_file(root)) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        if state.get("version") != SCAN_STATE_VERSION or state.get("root") != str(root):
+            return
+        names = tuple(state["names"])
+        for rel, (mtime, size, matches) in state["files"].items():
+            self._file_imports.setdefault(str(root / rel), (mtime, size, names, matches))
+
+    def save_scan_state(self, path: Path | str, modules: list[Module], state_file: Path | str | None = None):
+        """Persist cached import matches for path's current module set."""
+        import json
+
+        root = Path(path).resolve()
+        names = tuple(sorted({m.name for m in modules}))
+        prefix = str(root) + os.sep
+        files = {
+            key[len(prefix):].replace(os.sep, "/"): [mtime, size, matches]
+            for key, (mtime, size, cached_names, matches) in self._file_imports.items()
+            if key.startswith(prefix) and cached_names == names
+        }
+        target = Path(state_file) if state_file else _scan_state_file(root)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(target, json.dumps({"version": SCAN_STATE_VERSION, "root": str(root),
+                                         "names": list(names), "files": files}, separators=(",", ":")))
+
+    def _file_import_matches(self, file: Path, names: tuple[str, ...], patterns: dict) -> dict[str, int]:
+        """Import statement counts per module name in a file, cached per (mtime, size, module set)."""
+        key = str(file)
+        try:
+            st = os.stat(key)
+        except OSError:
+            return {}
+        cached = self._file_imports.get(key)
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size and cached[2] == names:
+            return cached[3]
+        try:
+            with open(key, encoding="utf-8", errors="ignore") as f:
+                content = f.read()
+        except OSError:
+            return {}
+        matches = {}
+        for name in names:
+            count = len(patterns[name].findall(content))
+            if count:
+                matches[name] = count
+        self._file_imports[key] = (st.st_mtime_ns, st.st_size, names, matches)
+        return matches
+
+    def _import_pattern(self, module_name: str):
+        """Compiled import regex for a module name (cached)."""
+        pattern = self._import_patterns.get(module_name)
+        if pattern is None:
+            import re
+            name = re.escape(module_name)
+            # Check for imports referencing another module
+            pattern = re.compile("|".join([
+                rf'from\s+["\'].*{name}',
+                rf'import\s+.*["\'].*{name}',
+                rf'require\(["\'].*{name}',
+                rf'from\s+{name}\s+import',
+            ]))
+            self._import_patterns[module_name] = pattern
+        return pattern
+
+    def rules(self):
+        """The compiled technology rule engine (loaded on first use)."""
+        if self._rules is None:
+            from tech_rules import RuleEngine
+            self._rules = RuleEngine.load(self._rules_file)
+        return self._rules
+
+    def detect_technologies(self, path: Path | str, manifests: list[Manifest],
+                            modules: list[Module] | None = None) -> list[Technology]:
+        """Detect technologies from dependencies, file signatures and compose images.
+
+        One record per technology, listing the modules that use it and the
+        evidence (dependency names, files, ``image:`` references) it came from.
+        """
+        from tech_rules import is_compose_file
+
+        root = Path(path).resolve()
+        idx = self.index(root)
+        engine = self.rules()
+        owners = sorted(modules or [], key=lambda m: -len(m.path))
+        records: dict[str, Technology] = {}
+
+        def hit(rule, source: str, module: str | None):
+            record = records.get(rule.name)
+            if record is None:
+                record = records[rule.name] = Technology(rule.name, rule.type, rule.c4_type, [], [])
+            if source not in record.sources:
+                record.sources.append(source)
+            if module and module not in record.modules:
+                record.modules.append(module)
+
+        for manifest in manifests:
+            for dep in manifest.dependencies + manifest.dev_dependencies:
+                for rule in engine.match_dependency(dep):
+                    hit(rule, dep, manifest.module)
+
+        for basename, rels in idx.by_name.items():
+            compose = is_compose_file(basename)
+            if not compose and not engine.may_match_file(basename):
+                continue
+            for rel in rels:
+                owner = _owner(owners, rel)
+                for rule in engine.match_file(rel):
+                    hit(rule, rel, owner)
+                if compose:
+                    images = self._manifest(root / rel, "compose", _read_compose_images) or []
+                    for image in images:
+                        for rule in engine.match_image(image):
+                            hit(rule, f"image:{image}", owner)
+
+        techs = sorted(records.values(), key=lambda t: t.name.lower())
+        for tech in techs:
+            tech.modules.sort()
+        return techs
+
+    def symbol_index(self, path: Path | str, index_file: Path | str | None = None):
+        """Load the persisted symbol index for path and bring it up to date.
+
+        Only files whose mtime or size changed since the last run are re-read;
+        the index is written back when anything changed.
+        """
+        from symbol_index import SymbolIndex
+
+        root = Path(path).resolve()
+        index_file = Path(index_file) if index_file else None
+        symbols = self._symbol_indexes.get(root)
+        if symbols is None:
+            symbols = self._symbol_indexes[root] = SymbolIndex.load(root, index_file)
+        idx = self.index(root)
+        if symbols.update([f for f in idx.files if _suffix(f) in CODE_EXTENSIONS]):
+            symbols.save(index_file)
+        return symbols
+
+    def trace_topic(self, path: Path | str, topic: str, limit: int = 20,
+                    index_file: Path | str | None = None) -> dict:
+        """Ranked files, entry points and module call chain for a topic ("payment flow")."""
+        root = Path(path).resolve()
+        modules = self.find_top_level_modules(root)
+        owners = sorted(modules, key=lambda m: -len(m.path))
+        names = tuple(sorted({m.name for m in modules}))
+        patterns = {name: self._import_pattern(name) for name in names}
+
+        def imports(rel: str) -> list[str]:
+            if _suffix(rel) not in IMPORT_SCAN_EXTENSIONS:
+                return []
+            return sorted(self._file_import_matches(root / rel, names, patterns))
+
+        symbols = self.symbol_index(root, index_file)
+        return symbols.query(topic, lambda rel: _owner(owners, rel), limit, imports)
+
+    def analyze(self, path: Path | str, time_budget: float | None = None,
+                max_files: int | None = None) -> Analysis:
+        """Run every phase on path and return the combined result.
+
+        With time_budget (seconds) or max_files, the cheap structural phases
+        run first and import scanning is sampled within what is left; the
+        result carries per-module and per-edge ``coverage``. Budgeted runs
+        persist their import matches, so running again (or with a larger
+        budget) refines the previous result instead of starting over.
+        """
+        import time
+
+        started = time.monotonic()
+        project_path = Path(path).resolve()
+        project_types = self.detect_project_type(project_path)
+        pkg_info = self.parse_package_json(project_path)
+        pyproject_info = self.parse_pyproject(project_path)
+        modules = self.find_top_level_modules(project_path)
+        manifests = self.find_manifests(project_path, modules)
+        entry_points = self.find_entry_points(project_path, project_types)
+        technologies = self.detect_technologies(project_path, manifests, modules)
+
+        coverage = None
+        if time_budget is None and max_files is None:
+            connections = self.find_cross_module_imports(project_path, modules)
+        else:
+            self.load_scan_state(project_path)
+            deadline = started + time_budget if time_budget is not None else None
+            connections, totals = self.scan_imports(project_path, modules, deadline, max_files)
+            self.save_scan_state(project_path, modules)
+            coverage = _coverage(connections, totals, time.monotonic() - started)
+
+        # Root-level dependencies per ecosystem (node/python always present).
+        dependencies: dict[str, list[str]] = {"node": [], "python": []}
+        root_manifests = [m for m in manifests if "/" not in m.path]
+        for manifest in root_manifests:
+            deps = dependencies.setdefault(manifest.ecosystem, [])
+            deps.extend(d for d in manifest.dependencies if d not in deps)
+
+        name = pkg_info.get("name") or pyproject_info.get("name")
+        description = pkg_info.get("description") or pyproject_info.get("description")
+        for manifest in root_manifests:
+            name = name or manifest.name
+        return Analysis(
+            project=ProjectInfo(
+                path=str(project_path),
+                name=name or project_path.name,
+                description=description or "",
+                types=project_types,
+            ),
+            modules=modules,
+            entry_points=entry_points,
+            connections=connections,
+            technologies=technologies,
+            dependencies=dependencies,
+            manifests=manifests,
+            coverage=coverage,
+        )
+
+
+def _proportional_schedule(candidates: dict[str, list[str]]) -> list[tuple[str, str]]:
+    """Interleave modules' files so every prefix samples each module by size.
+
+    Within a module, files are ordered by a stable hash so a sample spreads
+    over its subdirectories instead of taking the alphabetically first ones.
+    """
+    import hashlib
+
+    keyed = []
+    for name, rels in candidates.items():
+        ordered = sorted(rels, key=lambda r: hashlib.md5(r.encode()).digest())
+        n = len(ordered)
+        keyed += [((k + 0.5) / n, name, rel) for k, rel in enumerate(ordered)]
+    keyed.sort()
+    return [(name, rel) for _, name, rel in keyed]
+
+
+def _coverage(connections: list[Connection], totals: dict[str, tuple[int, int]], elapsed: float) -> dict:
+    """Coverage and confidence of a budgeted import scan, per module and edge."""
+    modules = {}
+    for name, (scanned, total) in sorted(totals.items()):
+        ratio = scanned / total if total else 1.0
+        modules[name] = {
+            "scanned": scanned,
+            "total": total,
+            "coverage": round(ratio, 3),
+            "confidence": "complete" if ratio == 1 else ("sampled" if scanned else "unscanned"),
+        }
+    edges = {}
+    for conn in connections:
+        scanned, total = totals[conn.from_]
+        ratio = scanned / total if scanned and total else 1.0
+        edges[f"{conn.from_}->{conn.to}"] = {
+            "coverage": modules[conn.from_]["coverage"],
+            "estimated_files": round(conn.files / ratio),
+            "confidence": "exact" if scanned == total else "estimated",
+        }
+    scanned = sum(s for s, _ in totals.values())
+    total = sum(t for _, t in totals.values())
+    return {
+        "complete": scanned == total,
+        "files_scanned": scanned,
+        "files_total": total,
+        "elapsed_seconds": round(elapsed, 2),
+        "modules": modules,
+        "connections": edges,
     }
 
-    all_deps = set(pkg_info.get("dependencies", []) + pkg_info.get("devDependencies", []))
 
-    for dep in all_deps:
-        dep_lower = dep.lower().replace("@", "").replace("/", "-")
-        for tech, info in indicators.items():
-            if tech in dep_lower:
-                techs.append({"name": dep, "technology_type": info["type"], "suggested_c4_type": info["c4_type"]})
+def _scan_state_file(root: Path) -> Path:
+    import hashlib
+    digest = hashlib.sha256(str(root).encode()).hexdigest()[:16]
+    return SCAN_STATE_DIR / f"{root.name}-{digest}.json"
 
-    # Check for Dockerfiles
-    if list(path.rglob("Dockerfile")) or list(path.rglob("docker-compose*.yml")):
-        techs.append({"name": "Docker", "technology_type": "deployment", "suggested_c4_type": "system"})
 
-    return techs
+def _owner(modules_longest_first: list[Module], rel: str) -> str | None:
+    """Name of the module containing rel (modules sorted longest path first)."""
+    return next((m.name for m in modules_longest_first if rel.startswith(m.path + "/")), None)
 
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: analyze_codebase.py <project_path> [--output json|summary]", file=sys.stderr)
+def _read_compose_images(file: Path) -> list[str]:
+    from tech_rules import compose_images
+    try:
+        return compose_images(file.read_text(encoding="utf-8", errors="ignore"))
+    except OSError:
+        return []
+
+
+def _suffix(rel: str) -> str:
+    name = rel.rpartition("/")[2]
+    dot = name.rfind(".")
+    return name[dot:] if dot > 0 else ""
+
+
+# ---------------------------------------------------------------------------
+# Watch mode
+# ---------------------------------------------------------------------------
+
+WATCHED_FILE_NAMES = {m for m in PROJECT_MARKERS if "*" not in m} | {"Dockerfile"}
+
+
+class Watcher:
+    """Keeps an analysis hot by polling mtimes and refreshing incrementally.
+
+    Each poll stats every indexed directory (catches added/removed/renamed
+    entries) and every import-scanned file or manifest (catches edits). Only
+    changed directories are re-listed, only changed files are re-read, and
+    only modules containing a change are recomputed.
+    """
+
+    def __init__(self, analyzer: Analyzer, path: Path | str):
+        self.analyzer = analyzer
+        self.root = Path(path).resolve()
+        self.idx = analyzer.index(self.root)
+        self.result = analyzer.analyze(self.root)
+        self._dirs: dict[str, int] = {}
+        self._files: dict[str, int] = {}
+        self._snapshot()
+
+    def _tracked_files(self) -> list[str]:
+        from manifests import manifest_kind
+        from tech_rules import is_compose_file
+        engine = self.analyzer.rules()
+        return [
+            f for f in self.idx.files
+            if _suffix(f) in IMPORT_SCAN_EXTENSIONS
+            or f.rpartition("/")[2] in WATCHED_FILE_NAMES
+            or manifest_kind(f.rpartition("/")[2])
+            or is_compose_file(f.rpartition("/")[2])
+            or engine.may_match_file(f.rpartition("/")[2])
+        ]
+
+    def _snapshot(self):
+        self._dirs = {d: _mtime(self.root / d) for d in ["", *self.idx.dirs]}
+        self._files = {f: _mtime(self.root / f) for f in self._tracked_files()}
+
+    def poll(self) -> list[str]:
+        """Return changed relative paths, refreshing the analysis if any."""
+        changed = [d for d, m in self._dirs.items() if _mtime(self.root / d) != m]
+        changed += [f for f, m in self._files.items() if _mtime(self.root / f) != m]
+        if not changed:
+            return []
+        self.analyzer.refresh(self.root, changed)
+        self.result = self.analyzer.analyze(self.root)
+        self._snapshot()
+        return changed
+
+    def run(self, on_change, interval: float = 1.0):
+        """Poll forever, calling on_change(result, changed) after each update."""
+        import time
+        while True:
+            time.sleep(interval)
+            changed = self.poll()
+            if changed:
+                on_change(self.result, changed)
+
+
+def _mtime(path: Path) -> int:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return -1
+
+
+def write_atomic(path: Path | str, text: str | bytes):
+    """Replace path with text (or bytes) so readers never see a partial file."""
+    import tempfile
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb" if isinstance(text, bytes) else "w") as f:
+            f.write(text)
+        # mkstemp creates 0600; keep the target's mode, or the umask default for a new file
+        try:
+            mode = os.stat(path).st_mode & 0o7777
+        except FileNotFoundError:
+            umask = os.umask(0)
+            os.umask(umask)
+            mode = 0o666 & ~umask
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def serve_socket(socket_path: str, get_payload):
+    """Serve get_payload() bytes to every client of a Unix socket (background thread)."""
+    import socketserver
+    import threading
+
+    class Handler(socketserver.BaseRequestHandler):
+        def handle(self):
+            self.request.sendall(get_payload())
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = socketserver.ThreadingUnixStreamServer(socket_path, Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def query_socket(socket_path: str) -> bytes:
+    """Read the latest analysis from a running --watch --socket process."""
+    import socket
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        chunks = []
+        while chunk := sock.recv(65536):
+            chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def watch(project_path: Path, output_file: str | None, socket_path: str | None, interval: float,
+          rules_file: str | None = None, connection_files: bool = False, max_nodes: int | None = None,
+          compact: bool = False, use_gzip: bool = False):
+    import signal
+    import time
+    from compact_format import dumps
+
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    start = time.perf_counter()
+    watcher = Watcher(Analyzer(rules_file, connection_files), project_path)
+    state = {"payload": b""}
+
+    def publish(result: Analysis, changed: list[str]):
+        data = result.to_dict()
+        if max_nodes:
+            from graph_summary import summarize
+            data = summarize(data, max_nodes)
+        state["payload"] = dumps(data, compact, use_gzip)
+        if output_file:
+            write_atomic(output_file, state["payload"] if use_gzip else state["payload"] + b"\n")
+
+    publish(watcher.result, [])
+    print(f"Indexed {len(watcher.idx.files)} files in {time.perf_counter() - start:.2f}s; "
+          f"watching {project_path} every {interval}s", file=sys.stderr)
+
+    server = serve_socket(socket_path, lambda: state["payload"]) if socket_path else None
+
+    def on_change(result: Analysis, changed: list[str]):
+        publish(result, changed)
+        print(f"Updated after {len(changed)} change(s): {', '.join(sorted(changed)[:5])}", file=sys.stderr)
+
+    try:
+        watcher.run(on_change, interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if server:
+            server.server_close()
+            os.unlink(socket_path)
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def print_summary(result: dict):
+    project = result["project"]
+    print(f"Project: {project['name']}")
+    print(f"Type(s): {', '.join(project['types'])}")
+    print(f"\nModules ({len(result['modules'])}):")
+    for m in result["modules"]:
+        print(f"  - {m['name']} ({m['type']}, {m['file_count']} files)")
+    print(f"\nEntry points ({len(result['entry_points'])}):")
+    for e in result["entry_points"]:
+        print(f"  - {e['file']} ({e['role']})")
+    print(f"\nConnections ({len(result['connections'])}):")
+    for c in result["connections"]:
+        print(f"  - {c['from']} -> {c['to']} ({c['files']} files, {c['imports']} imports)")
+    print(f"\nTechnologies ({len(result['technologies'])}):")
+    for t in result["technologies"]:
+        print(f"  - {t['name']} ({t['technology_type']})")
+    coverage = result.get("coverage")
+    if coverage:
+        print(f"\nImport scan coverage: {coverage['files_scanned']}/{coverage['files_total']} files"
+              f"{'' if coverage['complete'] else ' (partial; run again to refine)'}")
+        for name, mod in coverage["modules"].items():
+            if mod["confidence"] != "complete":
+                print(f"  - {name}: {mod['scanned']}/{mod['total']} ({mod['confidence']})")
+
+
+def print_topic(trace: dict):
+    print(f"Topic: {trace['topic']} (terms: {', '.join(trace['terms'])})")
+    print(f"\nFiles ({len(trace['files'])}):")
+    for f in trace["files"]:
+        print(f"  - {f['file']} [{f['module'] or '-'}] {f['score']}")
+    print(f"\nEntry points ({len(trace['entry_points'])}):")
+    for e in trace["entry_points"]:
+        label = f"{e['method']} {e['target']}" if e["kind"] != "definition" else e["target"]
+        print(f"  - {e['file']}:{e['line']} {e['kind']} {label}")
+    print(f"\nChain: {' -> '.join(trace['chain'])}")
+    for c in trace["call_chain"]:
+        print(f"  - {c['from']} -> {c['to']} via {', '.join(c['via'])}")
+
+
+def landscape(args):
+    from landscape import analyze_repos, merge_landscape, read_repo_list
+
+    repos = [(None, Path(p).resolve()) for p in args.project_path]
+    if args.repos:
+        repos += read_repo_list(args.repos)
+    missing = [str(p) for _, p in repos if not p.is_dir()]
+    if missing:
+        print(f"Error: not a directory: {', '.join(missing)}", file=sys.stderr)
         sys.exit(1)
 
-    project_path = Path(sys.argv[1]).resolve()
-    output_mode = "json"
+    results = analyze_repos(repos, args.rules, args.cache_dir, args.jobs)
+    cached = sum(1 for _, _, hit in results if hit)
+    print(f"Analyzed {len(results) - cached} repositories, {cached} unchanged (cached)", file=sys.stderr)
+    result = merge_landscape(results, args.name)
+    if args.max_nodes:
+        from graph_summary import summarize
+        result = summarize(result, args.max_nodes)
+
+    write_result(result, args)
+
+
+def write_result(result: dict, args):
+    if args.output == "summary":
+        print_summary(result)
+    elif args.output == "compact" or args.gzip:
+        from compact_format import dumps
+        sys.stdout.buffer.write(dumps(result, args.output == "compact", args.gzip))
+    else:
+        import json
+        print(json.dumps(result, indent=2))
 
-    if "--output" in sys.argv:
-        idx = sys.argv.index("--output")
-        if idx + 1 < len(sys.argv):
-            output_mode = sys.argv[idx + 1]
 
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Analyze a codebase for C4 diagramming")
+    parser.add_argument("project_path", nargs="*", help="Project directory to analyze; several directories "
+                                                        "are analyzed in parallel and merged into a landscape")
+    parser.add_argument("--repos", help="File listing repository roots (one per line, or a JSON list) to "
+                                        "analyze as one landscape")
+    parser.add_argument("--jobs", type=int, help="With several repositories: worker processes (default: CPU count)")
+    parser.add_argument("--cache-dir", help="With several repositories: per-repository result cache "
+                                            "(default: ~/.cache/architecture-diagram-skill/repos/)")
+    parser.add_argument("--name", default="Landscape", help="With several repositories: landscape name")
+    parser.add_argument("--output", default="json", choices=("json", "compact", "summary"),
+                        help="compact: interned column tables, see compact_format.py")
+    parser.add_argument("--gzip", action="store_true", help="Gzip json/compact output")
+    parser.add_argument("--depth", type=int, default=2, help="Module discovery depth")
+    parser.add_argument("--connection-files", action="store_true",
+                        help="List every importing file per connection (default: up to 5 examples)")
+    parser.add_argument("--rules", help="Technology rules JSON (default: tech_rules.json next to this script)")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and update the analysis as files change")
+    parser.add_argument("--output-file", help="With --watch: rewrite this file atomically on every change")
+    parser.add_argument("--socket", help="With --watch: serve the latest analysis on this Unix socket; "
+                                         "without --watch: query a running watcher")
+    parser.add_argument("--interval", type=float, default=1.0, help="With --watch: poll interval in seconds")
+    parser.add_argument("--time-budget", type=float, metavar="SECONDS",
+                        help="Return within roughly this time: structure first, then a size-proportional "
+                             "sample of import scanning; reruns refine the previous result")
+    parser.add_argument("--max-files", type=int, metavar="N",
+                        help="Read at most N new files for import scanning (same progressive behaviour)")
+    parser.add_argument("--max-nodes", type=int,
+                        help="Cluster the module graph down to at most N nodes (see graph_summary.py)")
+    parser.add_argument("--topic", help="Trace a feature (\"payment flow\"): ranked files, entry points "
+                                        "and module call chain from the persistent symbol index")
+    parser.add_argument("--limit", type=int, default=20, help="With --topic: number of files to return")
+    parser.add_argument("--index-file", help="With --topic: symbol index location "
+                                             "(default: ~/.cache/architecture-diagram-skill/symbols/)")
+
+    args = parser.parse_args()
+
+    if args.socket and not args.watch:
+        try:
+            payload = query_socket(args.socket)
+        except OSError:
+            print(f"Error: no watcher on {args.socket}", file=sys.stderr)
+            sys.exit(1)
+        sys.stdout.buffer.write(payload)
+        return
+
+    if not args.project_path and not args.repos:
+        parser.error("project_path is required")
+
+    if args.repos or len(args.project_path) > 1:
+        if args.watch or args.topic or args.time_budget or args.max_files:
+            parser.error("--watch, --topic, --time-budget and --max-files take a single project_path")
+        landscape(args)
+        return
+
+    project_path = Path(args.project_path[0]).resolve()
     if not project_path.is_dir():
         print(f"Error: {project_path} is not a directory", file=sys.stderr)
         sys.exit(1)
 
-    project_types = detect_project_type(project_path)
-    pkg_info = parse_package_json(project_path)
-    py_deps = parse_requirements(project_path)
-    pyproject_info = parse_pyproject(project_path)
-    modules = find_top_level_modules(project_path)
-    entry_points = find_entry_points(project_path, project_types)
-    connections = find_cross_module_imports(project_path, modules)
-    technologies = detect_technologies(project_path, pkg_info)
-
-    result = {
-        "project": {
-            "path": str(project_path),
-            "name": pkg_info.get("name") or pyproject_info.get("name") or project_path.name,
-            "description": pkg_info.get("description") or pyproject_info.get("description", ""),
-            "types": project_types,
-        },
-        "modules": modules,
-        "entry_points": entry_points,
-        "connections": connections,
-        "technologies": technologies,
-        "dependencies": {
-            "node": pkg_info.get("dependencies", []),
-            "python": py_deps,
-        },
-    }
+    if args.watch:
+        if not args.output_file and not args.socket:
+            parser.error("--watch needs --output-file and/or --socket")
+        if args.output == "summary" or args.topic or args.time_budget or args.max_files:
+            parser.error("--watch does not support --output summary, --topic, --time-budget or --max-files")
+        watch(project_path, args.output_file, args.socket, args.interval, args.rules,
+              args.connection_files, args.max_nodes, args.output == "compact", args.gzip)
+        return
 
-    if output_mode == "summary":
-        print(f"Project: {result['project']['name']}")
-        print(f"Type(s): {', '.join(project_types)}")
-        print(f"\nModules ({len(modules)}):")
-        for m in modules:
-            print(f"  - {m['name']} ({m['type']}, {m['file_count']} files)")
-        print(f"\nEntry points ({len(entry_points)}):")
-        for e in entry_points:
-            print(f"  - {e['file']} ({e['role']})")
-        print(f"\nConnections ({len(connections)}):")
-        for c in connections:
-            print(f"  - {c['from']} -> {c['to']}")
-        print(f"\nTechnologies ({len(technologies)}):")
-        for t in technologies:
-            print(f"  - {t['name']} ({t['technology_type']})")
-    else:
-        print(json.dumps(result, indent=2))
+    if args.topic:
+        trace = Analyzer(args.rules).trace_topic(project_path, args.topic, args.limit, args.index_file)
+        if args.output == "summary":
+            print_topic(trace)
+        else:
+            import json
+            print(json.dumps(trace, indent=2))
+        return
+
+    analyzer = Analyzer(args.rules, args.connection_files)
+    result = analyzer.analyze(project_path, args.time_budget, args.max_files).to_dict()
+    if args.max_nodes:
+        from graph_summary import summarize
+        result = summarize(result, args.max_nodes)
+    write_result(result, args)
 
 
 if __name__ == "__main__":
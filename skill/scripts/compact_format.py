@@ -0,0 +1,160 @@
+"""Compact, interned encoding of analyze_codebase.py output.
+
+Every string (module names, paths, language keys, technology names...) is
+stored once in a ``strings`` table and referenced by index. Lists of records
+(modules, connections, technologies, ...) become column tables, so edges are
+parallel ``from``/``to``/``imports``/``files`` arrays. The encoding is
+lossless: ``unpack(pack(analysis)) == analysis``.
+
+{
+  "format": "analysis-compact", "version": 1,
+  "strings": ["api", "src/api", ...],
+  "order": ["project", "modules", ...],
+  "tables": {"modules": {"rows": 4, "columns": {"name": {"kind": "s", "values": [0, 2, ...]}, ...}}},
+  "lists": {"dependencies": {"node": [5, 6]}},
+  "raw": {"project": {...}}
+}
+
+Column kinds: ``s`` string (or null), ``S`` list of strings, ``m`` mapping of
+string keys to scalars (flattened as [key, value, ...]), ``v`` anything else
+as-is. ``absent`` lists the rows that do not have the key at all.
+
+``load_analysis()`` reads plain JSON, compact JSON and either gzipped, so
+consumers accept every form.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import sys
+
+FORMAT = "analysis-compact"
+VERSION = 1
+
+
+def _column_kind(values: list) -> str:
+    if all(v is None or isinstance(v, str) for v in values):
+        return "s"
+    if all(isinstance(v, list) and all(isinstance(x, str) for x in v) for v in values):
+        return "S"
+    if all(isinstance(v, dict) and all(not isinstance(x, (dict, list)) for x in v.values()) for v in values):
+        return "m"
+    return "v"
+
+
+def _is_table(value) -> bool:
+    return isinstance(value, list) and bool(value) and all(isinstance(r, dict) for r in value)
+
+
+def _is_string_lists(value) -> bool:
+    return isinstance(value, dict) and bool(value) and all(
+        isinstance(v, list) and all(isinstance(x, str) for x in v) for v in value.values()
+    )
+
+
+def pack(analysis: dict) -> dict:
+    """Encode an analysis dict into the compact form."""
+    strings: list[str] = []
+    index: dict[str, int] = {}
+
+    def intern(text: str) -> int:
+        i = index.get(text)
+        if i is None:
+            i = index[text] = len(strings)
+            strings.append(text)
+        return i
+
+    tables, lists, raw = {}, {}, {}
+    for key, value in analysis.items():
+        if _is_table(value):
+            names = list(dict.fromkeys(k for row in value for k in row))
+            columns = {}
+            for name in names:
+                present = [row[name] for row in value if name in row]
+                kind = _column_kind(present)
+                if kind == "s":
+                    encoded = [None if v is None else intern(v) for v in present]
+                elif kind == "S":
+                    encoded = [[intern(x) for x in v] for v in present]
+                elif kind == "m":
+                    encoded = [[x for k, val in v.items() for x in (intern(k), val)] for v in present]
+                else:
+                    encoded = present
+                column = {"kind": kind, "values": encoded}
+                if len(present) != len(value):
+                    column["absent"] = [i for i, row in enumerate(value) if name not in row]
+                columns[name] = column
+            tables[key] = {"rows": len(value), "columns": columns}
+        elif _is_string_lists(value):
+            lists[key] = {k: [intern(x) for x in v] for k, v in value.items()}
+        else:
+            raw[key] = value
+    return {
+        "format": FORMAT,
+        "version": VERSION,
+        "strings": strings,
+        "order": list(analysis),
+        "tables": tables,
+        "lists": lists,
+        "raw": raw,
+    }
+
+
+def unpack(compact: dict) -> dict:
+    """Rebuild the analysis dict from its compact form."""
+    if compact.get("format") != FORMAT or compact.get("version") != VERSION:
+        raise ValueError(f"not a {FORMAT} v{VERSION} document")
+    strings = compact["strings"]
+    sections = {}
+    for key, table in compact["tables"].items():
+        rows: list[dict] = [{} for _ in range(table["rows"])]
+        for name, column in table["columns"].items():
+            absent = set(column.get("absent", ()))
+            values = iter(column["values"])
+            kind = column["kind"]
+            for i, row in enumerate(rows):
+                if i in absent:
+                    continue
+                v = next(values)
+                if kind == "s":
+                    row[name] = None if v is None else strings[v]
+                elif kind == "S":
+                    row[name] = [strings[x] for x in v]
+                elif kind == "m":
+                    row[name] = {strings[v[j]]: v[j + 1] for j in range(0, len(v), 2)}
+                else:
+                    row[name] = v
+        sections[key] = rows
+    for key, value in compact["lists"].items():
+        sections[key] = {k: [strings[x] for x in v] for k, v in value.items()}
+    sections.update(compact["raw"])
+    return {key: sections[key] for key in compact["order"]}
+
+
+def dumps(analysis: dict, compact: bool = False, use_gzip: bool = False) -> bytes:
+    """Serialize an analysis: indented JSON, or compact (no whitespace), optionally gzipped."""
+    if compact:
+        data = json.dumps(pack(analysis), separators=(",", ":"), ensure_ascii=False).encode()
+    else:
+        data = json.dumps(analysis, indent=2, ensure_ascii=False).encode()
+    return gzip.compress(data, mtime=0) if use_gzip else data
+
+
+def loads(data: bytes | str) -> dict:
+    """Parse plain or compact analysis JSON, gzipped or not."""
+    if isinstance(data, bytes):
+        if data[:2] == b"\x1f\x8b":
+            data = gzip.decompress(data)
+        data = data.decode("utf-8")
+    value = json.loads(data)
+    if isinstance(value, dict) and value.get("format") == FORMAT:
+        return unpack(value)
+    return value
+
+
+def load_analysis(path: str) -> dict:
+    """Read an analysis (or plan) file in any supported form; ``-`` reads stdin."""
+    if path == "-":
+        return loads(sys.stdin.buffer.read())
+    with open(path, "rb") as f:
+        return loads(f.read())
@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""Compile analyze_codebase.py output into a push_to_icepanel.py plan.
+
+Applies the mapping rules from references/plan-format.md and the diagram
+type decision logic from SKILL.md deterministically, so the same analysis
+always produces the same plan:
+
+- modules become apps, stores or components (using type, has_dockerfile
+  and is_deployable)
+- connections are aggregated into one plan connection per module pair
+- technologies become data stores, message brokers and external systems
+- the diagram type is chosen from the shape of the analysis; summarized
+  analyses (graph_summary.py) compile to a context diagram of clusters, and
+  landscapes (several repositories) to a context diagram of repositories
+
+An optional overrides file keeps curated names and captions stable across
+regenerations. It is keyed by the generated refs:
+
+{
+  "objects": {
+    "api": {"name": "API Server", "caption": "REST API"},
+    "scripts": {"exclude": true}
+  },
+  "connections": {
+    "web->api": {"name": "API calls"}
+  },
+  "diagram": {"name": "Shop - Containers"},
+  "add": {"objects": [...], "connections": [...]},
+  "existing_refs": {"billing": "<icepanel-object-id>"}
+}
+
+Usage:
+    python compile_plan.py <analysis.json|-> [--overrides overrides.json]
+        [--diagram-type auto|context-diagram|app-diagram|component-diagram]
+        [--output plan.json]
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import sys
+
+DIAGRAM_TYPES = ("context-diagram", "app-diagram", "component-diagram")
+
+MODULE_TYPE_MAP = {
+    "API service": "app",
+    "server": "app",
+    "backend service": "app",
+    "web application": "app",
+    "frontend": "app",
+    "API gateway": "app",
+    "authentication service": "app",
+    "background worker": "app",
+    "message queue consumer": "app",
+    "database layer": "store",
+    "shared library": "component",
+    "library": "component",
+    "utilities": "component",
+    "configuration": "component",
+    "data models": "component",
+}
+
+FRONTEND_TYPES = {"web application", "frontend"}
+BACKEND_TYPES = {
+    "API service", "server", "backend service", "API gateway",
+    "authentication service", "background worker", "message queue consumer",
+    "database layer", "service layer", "module",
+}
+
+# ORMs are detected as data storage but sit in front of a database rather than
+# being one: they fold into the detected relational database(s), or stand for a
+# generic "Database" store when none was detected.
+ORM_TECHNOLOGIES = {"Prisma", "TypeORM", "Sequelize", "SQLAlchemy"}
+RELATIONAL_DATABASES = {"PostgreSQL", "MySQL", "SQLite"}
+ORM_STORE_LABEL = "Database"
+CAPTION_SOURCES = 4
+
+
+def slugify(name: str) -> str:
+    """Turn a display name into a plan ref."""
+    slug = re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+    return slug or "item"
+
+
+def unique_ref(base: str, used: set[str]) -> str:
+    """Return base, or base-2, base-3... if already taken."""
+    ref = base
+    n = 2
+    while ref in used:
+        ref = f"{base}-{n}"
+        n += 1
+    used.add(ref)
+    return ref
+
+
+def technology_label(tech: dict) -> str:
+    """Display name for a detected technology (the rule engine's canonical name)."""
+    return tech.get("label") or tech["name"]
+
+
+def source_label(source: str) -> str:
+    """Readable form of one piece of technology evidence."""
+    return f"{source[6:]} image" if source.startswith("image:") else source
+
+
+def technology_caption(item: dict) -> str:
+    sources = [source_label(s) for s in item["sources"]]
+    if len(sources) > CAPTION_SOURCES:
+        sources = sources[:CAPTION_SOURCES] + ["…"]
+    return ", ".join(sources)
+
+
+def classify_technologies(technologies: list[dict]) -> tuple[list[dict], list[dict], list[dict]]:
+    """Split technologies into (stores, brokers, externals), one entry per label.
+
+    Each entry has the label, the evidence it was detected from (``sources``:
+    dependency names, files, compose images) and the modules using it.
+    """
+    groups: dict[str, dict[str, dict]] = {"store": {}, "broker": {}, "external": {}}
+    databases = sorted(technology_label(t) for t in technologies
+                       if technology_label(t) in RELATIONAL_DATABASES)
+
+    def add(kind: str, label: str, sources: list[str], modules: list[str]):
+        entry = groups[kind].setdefault(label, {"label": label, "sources": [], "modules": []})
+        entry["sources"] += [s for s in sources if s not in entry["sources"]]
+        entry["modules"] += [m for m in modules if m not in entry["modules"]]
+
+    for tech in technologies:
+        ttype = tech.get("technology_type")
+        if ttype == "data-storage":
+            kind = "store"
+        elif ttype == "message-broker":
+            kind = "broker"
+        elif tech.get("suggested_c4_type") == "system" and ttype != "deployment":
+            kind = "external"
+        else:
+            continue
+        label = technology_label(tech)
+        sources = tech.get("sources") or [tech["name"]]
+        modules = tech.get("modules", [])
+        if kind == "store" and label in ORM_TECHNOLOGIES:
+            for database in databases or [ORM_STORE_LABEL]:
+                add(kind, database, [label], modules)
+            continue
+        add(kind, label, sources, modules)
+
+    def ordered(kind: str) -> list[dict]:
+        items = sorted(groups[kind].values(), key=lambda e: e["label"].lower())
+        for item in items:
+            item["modules"].sort()
+        return items
+
+    return ordered("store"), ordered("broker"), ordered("external")
+
+
+def is_deployable(mod: dict) -> bool:
+    return bool(mod.get("has_dockerfile") or mod.get("is_deployable"))
+
+
+def choose_diagram_type(analysis: dict) -> tuple[str, str]:
+    """Pick a diagram type using the decision table in SKILL.md.
+
+    Returns (diagram_type, reason).
+    """
+    modules = analysis.get("modules", [])
+    stores, brokers, _ = classify_technologies(analysis.get("technologies", []))
+    independent = [m for m in modules if m.get("has_dockerfile") and m.get("has_own_manifest")]
+    deployable = [m for m in modules if is_deployable(m)]
+    has_stores = bool(stores) or any(m.get("type") == "database layer" for m in modules)
+
+    if analysis.get("repositories"):
+        return "context-diagram", f"Landscape of {len(analysis['repositories'])} repositories"
+    if analysis.get("clusters"):
+        return "context-diagram", f"Summarized into {len(modules)} module clusters (drill down per cluster)"
+    if len(independent) >= 2:
+        return "context-diagram", "Multiple independent systems communicating"
+    if len(modules) <= 2 and not has_stores and not brokers:
+        return "context-diagram", "Simple app (few components)"
+    if deployable or has_stores or brokers:
+        return "app-diagram", "One system with internal apps/stores/workers"
+    return "component-diagram", "One container with internal modules"
+
+
+def module_object_type(mod: dict, diagram_type: str) -> str:
+    """Map an analyzed module to an IcePanel object type for the given level."""
+    if diagram_type == "context-diagram":
+        return "system"
+    if diagram_type == "component-diagram":
+        return "component"
+    obj_type = MODULE_TYPE_MAP.get(mod.get("type", "module"), "app")
+    if obj_type == "component" and is_deployable(mod):
+        return "app"
+    return obj_type
+
+
+def module_caption(mod: dict) -> str:
+    caption = mod.get("type", "module")
+    languages = list(mod.get("languages", {}))
+    if languages:
+        caption = f"{caption} ({languages[0].lstrip('.')})"
+    return caption[:1].upper() + caption[1:]
+
+
+def aggregate_connections(connections: list[dict]) -> dict[tuple[str, str], dict]:
+    """Collapse connection records into one entry per (from, to) pair.
+
+    Accepts aggregated records (``imports``, ``files`` count, ``examples``)
+    as well as older per-file records (``file``); each entry has imports,
+    files (count), examples (bounded) and packages.
+    """
+    from analyze_codebase import CONNECTION_EXAMPLES
+
+    pairs: dict[tuple[str, str], dict] = {}
+    seen: dict[tuple[str, str], set[str]] = {}
+    for conn in connections:
+        key = (conn["from"], conn["to"])
+        entry = pairs.setdefault(key, {"imports": 0, "files": 0, "examples": [], "packages": set()})
+        entry["imports"] += conn.get("imports", 1)
+        if conn.get("file"):
+            files = seen.setdefault(key, set())
+            if conn["file"] not in files:
+                files.add(conn["file"])
+                entry["files"] += 1
+                if len(entry["examples"]) < CONNECTION_EXAMPLES:
+                    entry["examples"].append(conn["file"])
+        else:
+            entry["files"] += conn.get("files", 0)
+            room = CONNECTION_EXAMPLES - len(entry["examples"])
+            entry["examples"] += [f for f in conn.get("examples", ()) if f not in entry["examples"]][:max(room, 0)]
+        entry["packages"].update(conn.get("packages", ()))
+    return pairs
+
+
+def compile_plan(analysis: dict, overrides: dict | None = None, diagram_type: str = "auto") -> dict:
+    """Build a plan dict from an analysis dict."""
+    overrides = overrides or {}
+    object_overrides = overrides.get("objects", {})
+    connection_overrides = overrides.get("connections", {})
+
+    if diagram_type == "auto":
+        diagram_type, _ = choose_diagram_type(analysis)
+
+    project = analysis.get("project", {})
+    project_name = project.get("name") or "System"
+    modules = analysis.get("modules", [])
+    stores, brokers, externals = classify_technologies(analysis.get("technologies", []))
+
+    used_refs: set[str] = set()
+    objects: list[dict] = []
+    module_refs: dict[str, str] = {}
+
+    # Containment: apps/stores live in a system, components in an app.
+    container_ref = None
+    system_ref = None
+    if diagram_type in ("app-diagram", "component-diagram"):
+        system_ref = unique_ref(slugify(project_name), used_refs)
+        objects.append({
+            "ref": system_ref,
+            "name": project_name,
+            "type": "system",
+            "caption": project.get("description") or "",
+            "parentRef": None,
+        })
+        container_ref = system_ref
+    if diagram_type == "component-diagram":
+        app_ref = unique_ref(f"{system_ref}-app", used_refs)
+        objects.append({
+            "ref": app_ref,
+            "name": project_name,
+            "type": "app",
+            "caption": ", ".join(project.get("types", [])),
+            "parentRef": system_ref,
+        })
+        container_ref = app_ref
+
+    if any(m.get("type") in FRONTEND_TYPES for m in modules):
+        objects.append({
+            "ref": unique_ref("user", used_refs),
+            "name": "User",
+            "type": "actor",
+            "caption": "Uses the application",
+            "parentRef": None,
+        })
+
+    for mod in modules:
+        ref = unique_ref(slugify(mod["name"]), used_refs)
+        module_refs[mod["name"]] = ref
+        description = f"`{mod['path']}` — {mod.get('file_count', 0)} code files"
+        if mod.get("members"):
+            description += f" in {len(mod['members'])} modules: {', '.join(mod['members'][:8])}"
+            if len(mod["members"]) > 8:
+                description += ", …"
+        objects.append({
+            "ref": ref,
+            "name": mod["name"],
+            "type": module_object_type(mod, diagram_type),
+            "caption": module_caption(mod),
+            "description": description,
+            "parentRef": container_ref,
+        })
+
+    # Stores and brokers are internal to the system; C1 leaves them out.
+    tech_refs: list[tuple[str, str, dict]] = []
+    if diagram_type != "context-diagram":
+        store_parent = system_ref
+        for kind, items in (("store", stores), ("app", brokers)):
+            for item in items:
+                ref = unique_ref(slugify(item["label"]), used_refs)
+                tech_refs.append((ref, kind, item))
+                objects.append({
+                    "ref": ref,
+                    "name": item["label"],
+                    "type": kind,
+                    "caption": technology_caption(item),
+                    "parentRef": store_parent,
+                })
+    for item in externals:
+        ref = unique_ref(slugify(item["label"]), used_refs)
+        tech_refs.append((ref, "external", item))
+        objects.append({
+            "ref": ref,
+            "name": item["label"],
+            "type": "system",
+            "caption": technology_caption(item),
+            "external": True,
+            "parentRef": None,
+        })
+
+    connections: list[dict] = []
+    for (origin, target), entry in sorted(aggregate_connections(analysis.get("connections", [])).items()):
+        if origin not in module_refs or target not in module_refs:
+            continue
+        files = entry["files"] or entry["imports"]
+        description = f"{files} importing file{'s' if files != 1 else ''}"
+        if entry["packages"]:
+            description = f"Depends on {', '.join(sorted(entry['packages']))}"
+        connections.append({
+            "name": "Uses",
+            "originRef": module_refs[origin],
+            "targetRef": module_refs[target],
+            "direction": "outgoing",
+            "description": description,
+        })
+
+    # Technologies without module attribution are wired to the backend-like modules.
+    backend_refs = [module_refs[m["name"]] for m in modules if m.get("type") in BACKEND_TYPES]
+    for ref, kind, item in tech_refs:
+        origins = [module_refs[m] for m in item["modules"] if m in module_refs] or backend_refs
+        for origin in origins:
+            connections.append({
+                "name": "Reads/Writes" if kind == "store" else "Uses",
+                "originRef": origin,
+                "targetRef": ref,
+                "direction": "outgoing",
+            })
+
+    for obj in objects:
+        if obj["type"] != "actor":
+            continue
+        for mod in modules:
+            if mod.get("type") in FRONTEND_TYPES:
+                connections.append({
+                    "name": "Uses",
+                    "originRef": obj["ref"],
+                    "targetRef": module_refs[mod["name"]],
+                    "direction": "outgoing",
+                })
+
+    # Apply overrides: exclusions first so dangling connections are dropped.
+    excluded = {ref for ref, ov in object_overrides.items() if ov.get("exclude")}
+    objects = [o for o in objects if o["ref"] not in excluded]
+    for obj in objects:
+        for key, value in object_overrides.get(obj["ref"], {}).items():
+            if key != "exclude":
+                obj[key] = value
+    for obj in objects:
+        if obj.get("parentRef") in excluded:
+            obj["parentRef"] = None
+
+    compiled = []
+    for conn in connections:
+        if conn["originRef"] in excluded or conn["targetRef"] in excluded:
+            continue
+        ov = connection_overrides.get(f"{conn['originRef']}->{conn['targetRef']}", {})
+        if ov.get("exclude"):
+            continue
+        conn.update({k: v for k, v in ov.items() if k != "exclude"})
+        compiled.append(conn)
+
+    added = overrides.get("add", {})
+    objects.extend(added.get("objects", []))
+    compiled.extend(added.get("connections", []))
+
+    labels = {
+        "context-diagram": "System Context",
+        "app-diagram": "Containers",
+        "component-diagram": "Components",
+    }
+    diagram = {"name": f"{project_name} - {labels[diagram_type]}", "type": diagram_type}
+    diagram.update(overrides.get("diagram", {}))
+
+    plan = {"objects": objects, "connections": compiled, "diagram": diagram}
+    if overrides.get("existing_refs"):
+        plan["existing_refs"] = overrides["existing_refs"]
+    if overrides.get("flows"):
+        plan["flows"] = overrides["flows"]
+    return plan
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compile codebase analysis into an IcePanel plan")
+    parser.add_argument("analysis_file", help="Path to analyze_codebase.py output (plain or compact, "
+                                              "optionally gzipped), or - for stdin")
+    parser.add_argument("--overrides", help="Path to overrides JSON (curated names, captions, exclusions)")
+    parser.add_argument("--diagram-type", default="auto", choices=("auto",) + DIAGRAM_TYPES)
+    parser.add_argument("--output", "-o", help="Write plan to this file instead of stdout")
+
+    args = parser.parse_args()
+
+    from compact_format import load_analysis
+
+    analysis = load_analysis(args.analysis_file)
+
+    overrides = None
+    if args.overrides:
+        try:
+            with open(args.overrides) as f:
+                overrides = json.load(f)
+        except FileNotFoundError:
+            print(f"Warning: overrides file {args.overrides} not found, ignoring", file=sys.stderr)
+
+    reason = "requested explicitly"
+    if args.diagram_type == "auto":
+        _, reason = choose_diagram_type(analysis)
+    plan = compile_plan(analysis, overrides, args.diagram_type)
+    print(f"Diagram type: {plan['diagram']['type']} ({reason})", file=sys.stderr)
+
+    text = json.dumps(plan, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+        print(f"Wrote {len(plan['objects'])} objects, {len(plan['connections'])} connections to {args.output}",
+              file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""Generate Mermaid C4 diagrams from analysis or plan JSON, with a render cache.
+
+Accepts either analyze_codebase.py output (compiled to a plan first, see
+compile_plan.py) or a push_to_icepanel.py plan, and writes:
+
+- one C4Context / C4Container / C4Component diagram for the plan's diagram
+- one C4Dynamic (or sequenceDiagram) per flow in the plan
+
+Rendering goes through a cache keyed by the SHA-256 of the Mermaid source and
+render options, so unchanged diagrams are never re-rendered. All uncached
+diagrams are rendered with a single mermaid-cli invocation.
+
+Usage:
+    python generate_mermaid.py <analysis-or-plan.json|-> [--out-dir DIR]
+        [--flow-style dynamic|sequence] [--render] [--format png|svg]
+        [--cache-dir DIR]
+
+    # Render hand-edited diagrams in one batch (cached by content hash):
+    python generate_mermaid.py a.mmd b.mmd --out-dir DIR --render
+
+    The mermaid-cli command defaults to
+    "npx -p @mermaid-js/mermaid-cli mmdc"; override with MERMAID_CLI.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import sys
+from pathlib import Path
+
+DEFAULT_MMDC = "npx -p @mermaid-js/mermaid-cli mmdc"
+DEFAULT_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "architecture-diagram-skill" / "mermaid"
+
+DIAGRAM_KEYWORDS = {
+    "context-diagram": "C4Context",
+    "app-diagram": "C4Container",
+    "component-diagram": "C4Component",
+}
+
+BOUNDARY_KEYWORDS = {
+    "system": "System_Boundary",
+    "app": "Container_Boundary",
+    "store": "Container_Boundary",
+    "group": "Boundary",
+}
+
+
+def alias(ref: str) -> str:
+    """Turn a plan ref into a Mermaid-safe alias."""
+    name = re.sub(r"\W+", "_", ref).strip("_") or "node"
+    return f"n_{name}" if name[0].isdigit() else name
+
+
+def quote(text: str | None) -> str:
+    return '"' + (text or "").replace('"', "'").replace("\n", " ") + '"'
+
+
+def element_line(obj: dict) -> str:
+    """Render a plan object as a Mermaid C4 element (see references/c4-mapping.md)."""
+    ref = alias(obj["ref"])
+    name = quote(obj["name"])
+    desc = quote(obj.get("caption") or obj.get("description"))
+    tech = quote(obj.get("technology", ""))
+    ext = "_Ext" if obj.get("external") else ""
+    otype = obj.get("type")
+    if otype == "actor":
+        return f"Person{ext}({ref}, {name}, {desc})"
+    if otype == "system":
+        return f"System{ext}({ref}, {name}, {desc})"
+    if otype == "store":
+        return f"ContainerDb{ext}({ref}, {name}, {tech}, {desc})"
+    if otype == "component":
+        return f"Component{ext}({ref}, {name}, {tech}, {desc})"
+    return f"Container{ext}({ref}, {name}, {tech}, {desc})"
+
+
+def generate_structure(plan: dict) -> str:
+    """Generate the structural C4 diagram for a plan."""
+    diagram = plan.get("diagram") or {}
+    keyword = DIAGRAM_KEYWORDS.get(diagram.get("type", "context-diagram"), "C4Context")
+    objects = plan.get("objects", [])
+    by_ref = {o["ref"]: o for o in objects}
+    children: dict[str | None, list[dict]] = {}
+    for obj in objects:
+        parent = obj.get("parentRef")
+        children.setdefault(parent if parent in by_ref else None, []).append(obj)
+
+    lines = [keyword, f"    title {diagram.get('name', 'Architecture')}", ""]
+
+    def emit(obj: dict, depth: int):
+        pad = "    " * depth
+        kids = children.get(obj["ref"], [])
+        if kids:
+            boundary = BOUNDARY_KEYWORDS.get(obj.get("type"), "Boundary")
+            lines.append(f"{pad}{boundary}({alias(obj['ref'])}, {quote(obj['name'])}) {{")
+            for kid in kids:
+                emit(kid, depth + 1)
+            lines.append(f"{pad}}}")
+        else:
+            lines.append(pad + element_line(obj))
+
+    # Actors first, externals last (statement order drives layout).
+    roots = children.get(None, [])
+    order = {"actor": 0}
+    for obj in sorted(roots, key=lambda o: (order.get(o.get("type"), 1), bool(o.get("external")))):
+        emit(obj, 1)
+
+    connections = plan.get("connections", [])
+    if connections:
+        lines.append("")
+    for conn in connections:
+        if conn.get("originRef") not in by_ref or conn.get("targetRef") not in by_ref:
+            continue
+        rel = "BiRel" if conn.get("direction") == "bidirectional" else "Rel"
+        args = [alias(conn["originRef"]), alias(conn["targetRef"]), quote(conn.get("name", "Uses"))]
+        if conn.get("technology"):
+            args.append(quote(conn["technology"]))
+        lines.append(f"    {rel}({', '.join(args)})")
+
+    if len(objects) > 5:
+        per_row = 3 if len(objects) <= 9 else 4
+        lines.extend(["", f'    UpdateLayoutConfig($c4ShapeInRow="{per_row}", $c4BoundaryInRow="1")'])
+    return "\n".join(lines) + "\n"
+
+
+def step_tree(flow: dict) -> dict[str | None, list[dict]]:
+    """Group flow steps by parent, in index order.
+
+    A nested step's parentId may name either the branching step itself or
+    one of its paths; both are keyed by that ID.
+    """
+    steps = flow.get("steps", [])
+    known = {s.get("id") for s in steps}
+    for step in steps:
+        known.update((step.get("paths") or {}).keys())
+    kids: dict[str | None, list[dict]] = {}
+    for step in steps:
+        parent = step.get("parentId")
+        kids.setdefault(parent if parent in known else None, []).append(step)
+    for items in kids.values():
+        items.sort(key=lambda s: s.get("index", 0))
+    return kids
+
+
+def branch_paths(step: dict, kids: dict[str | None, list[dict]]) -> list[tuple[str, list[dict]]]:
+    """Return (path name, child steps) for an alternate/parallel step.
+
+    Children parented to the step itself (rather than to a path) are spread
+    one per path when the counts match, otherwise kept in the first path.
+    """
+    paths = sorted((step.get("paths") or {}).items(), key=lambda kv: kv[1].get("index", 0))
+    direct = kids.get(step.get("id"), [])
+    if not paths:
+        return [(step.get("description", ""), direct)]
+    result = [(p.get("name", pid), list(kids.get(pid, []))) for pid, p in paths]
+    if len(direct) == len(result):
+        for (_, items), child in zip(result, direct):
+            items.append(child)
+    else:
+        result[0][1].extend(direct)
+    return result
+
+
+def flow_steps(flow: dict) -> list[dict]:
+    """Flatten flow steps depth-first in display order."""
+    kids = step_tree(flow)
+    result: list[dict] = []
+
+    def walk(items: list[dict]):
+        for step in items:
+            result.append(step)
+            if step.get("type") in ("alternate-path", "parallel-path"):
+                for _, branch in branch_paths(step, kids):
+                    walk(branch)
+
+    walk(kids.get(None, []))
+    return result
+
+
+def generate_dynamic(flow: dict, plan: dict) -> str:
+    """Generate a C4Dynamic diagram for a flow; branches are flattened in order."""
+    by_ref = {o["ref"]: o for o in plan.get("objects", [])}
+    steps = flow_steps(flow)
+    used: list[str] = []
+    for step in steps:
+        for key in ("originRef", "targetRef"):
+            ref = step.get(key)
+            if ref in by_ref and ref not in used:
+                used.append(ref)
+
+    lines = ["C4Dynamic", f"    title {flow.get('name', 'Flow')}", ""]
+    for ref in used:
+        lines.append("    " + element_line(by_ref[ref]))
+    lines.append("")
+    n = 0
+    for step in steps:
+        origin, target = step.get("originRef"), step.get("targetRef")
+        if step.get("type") not in ("outgoing", "reply") or origin not in by_ref or target not in by_ref:
+            continue
+        n += 1
+        lines.append(f"    Rel({alias(origin)}, {alias(target)}, {quote(f'{n}. ' + step.get('description', ''))})")
+    return "\n".join(lines) + "\n"
+
+
+def generate_sequence(flow: dict, plan: dict) -> str:
+    """Generate a sequenceDiagram for a flow, with alt/par blocks for branches."""
+    by_ref = {o["ref"]: o for o in plan.get("objects", [])}
+    kids = step_tree(flow)
+    lines = ["sequenceDiagram", f"    title {flow.get('name', 'Flow')}"]
+    participants: list[str] = []
+    for step in flow_steps(flow):
+        for key in ("originRef", "targetRef"):
+            ref = step.get(key)
+            if ref in by_ref and ref not in participants:
+                participants.append(ref)
+                kind = "actor" if by_ref[ref].get("type") == "actor" else "participant"
+                lines.append(f"    {kind} {alias(ref)} as {by_ref[ref]['name']}")
+
+    def text(step: dict) -> str:
+        return (step.get("description") or "").replace(";", ",").replace("\n", " ")
+
+    def emit(items: list[dict], depth: int):
+        pad = "    " * depth
+        for step in items:
+            stype = step.get("type")
+            origin, target = step.get("originRef"), step.get("targetRef")
+            if stype in ("alternate-path", "parallel-path"):
+                keyword, joiner = ("alt", "else") if stype == "alternate-path" else ("par", "and")
+                for i, (name, branch) in enumerate(branch_paths(step, kids)):
+                    lines.append(f"{pad}{keyword if i == 0 else joiner} {name}")
+                    emit(branch, depth + 1)
+                lines.append(f"{pad}end")
+            elif stype in ("outgoing", "reply") and origin in by_ref and target in by_ref:
+                arrow = "-->>" if stype == "reply" else "->>"
+                lines.append(f"{pad}{alias(origin)}{arrow}{alias(target)}: {text(step)}")
+            elif stype == "self-action" and origin in by_ref:
+                lines.append(f"{pad}{alias(origin)}->>{alias(origin)}: {text(step)}")
+            elif text(step) and participants:
+                span = alias(participants[0])
+                if len(participants) > 1:
+                    span += f",{alias(participants[-1])}"
+                lines.append(f"{pad}Note over {span}: {text(step)}")
+
+    emit(kids.get(None, []), 1)
+    return "\n".join(lines) + "\n"
+
+
+def load_plan(data: dict) -> dict:
+    """Accept either a plan or an analysis (compiled to a plan on the fly)."""
+    if "modules" in data and "objects" not in data:
+        from compile_plan import compile_plan
+        return compile_plan(data)
+    return data
+
+
+def slugify(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-") or "diagram"
+
+
+def generate_all(plan: dict, flow_style: str = "dynamic") -> dict[str, str]:
+    """Generate every diagram for a plan, keyed by output file stem."""
+    diagrams: dict[str, str] = {}
+    if plan.get("objects"):
+        name = (plan.get("diagram") or {}).get("name", "architecture")
+        diagrams[slugify(name)] = generate_structure(plan)
+    for flow in plan.get("flows", []):
+        stem = slugify(flow.get("name", "flow"))
+        while stem in diagrams:
+            stem += "-2"
+        if flow_style == "sequence":
+            diagrams[stem] = generate_sequence(flow, plan)
+        else:
+            diagrams[stem] = generate_dynamic(flow, plan)
+    return diagrams
+
+
+def cache_key(source: str, fmt: str, width: int, height: int) -> str:
+    options = f"{fmt}:{width}x{height}\n"
+    return hashlib.sha256((options + source).encode()).hexdigest()
+
+
+def render_all(
+    sources: dict[str, str],
+    out_dir: Path,
+    fmt: str = "png",
+    width: int = 2048,
+    height: int = 1536,
+    cache_dir: Path = DEFAULT_CACHE_DIR,
+    mmdc: str | None = None,
+) -> dict[str, Path]:
+    """Render Mermaid sources to out_dir, reusing cached renders.
+
+    All cache misses are rendered by one mermaid-cli run over a generated
+    Markdown file (mmdc renders each fenced block to <stem>-<n>.<fmt>).
+    Returns stem -> rendered file for every diagram that rendered.
+    """
+    import shlex
+    import shutil
+    import subprocess
+    import tempfile
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rendered: dict[str, Path] = {}
+    misses: dict[str, list[str]] = {}
+    for stem, source in sources.items():
+        key = cache_key(source, fmt, width, height)
+        cached = cache_dir / f"{key}.{fmt}"
+        if cached.exists():
+            target = out_dir / f"{stem}.{fmt}"
+            shutil.copyfile(cached, target)
+            rendered[stem] = target
+        else:
+            misses.setdefault(key, []).append(stem)
+
+    print(f"Render cache: {len(rendered)} hit(s), {len(misses)} to render", file=sys.stderr)
+    if not misses:
+        return rendered
+
+    keys = list(misses)
+    command = shlex.split(mmdc or os.environ.get("MERMAID_CLI", DEFAULT_MMDC))
+    with tempfile.TemporaryDirectory() as tmp:
+        batch = Path(tmp) / "batch.md"
+        batch.write_text("".join(f"```mermaid\n{sources[misses[k][0]]}```\n\n" for k in keys))
+        result = subprocess.run(
+            command + ["-i", str(batch), "-o", str(Path(tmp) / "out.md"),
+                       "-e", fmt, "-w", str(width), "-H", str(height)],
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            print(f"Warning: mermaid-cli failed: {result.stderr.strip()}", file=sys.stderr)
+        for i, key in enumerate(keys, start=1):
+            image = Path(tmp) / f"out-{i}.{fmt}"
+            if not image.exists():
+                print(f"  Warning: no render produced for {', '.join(misses[key])}", file=sys.stderr)
+                continue
+            shutil.copyfile(image, cache_dir / f"{key}.{fmt}")
+            for stem in misses[key]:
+                target = out_dir / f"{stem}.{fmt}"
+                shutil.copyfile(image, target)
+                rendered[stem] = target
+    return rendered
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate Mermaid C4 diagrams from analysis or plan JSON")
+    parser.add_argument("inputs", nargs="+",
+                        help="analyze_codebase.py output or plan JSON (- for stdin), or .mmd files to render")
+    parser.add_argument("--out-dir", help="Write <name>.mmd files here (default: print to stdout)")
+    parser.add_argument("--flow-style", default="dynamic", choices=("dynamic", "sequence"),
+                        help="Render flows as C4Dynamic or sequenceDiagram")
+    parser.add_argument("--render", action="store_true", help="Render diagrams to images (requires --out-dir)")
+    parser.add_argument("--format", default="png", choices=("png", "svg", "pdf"))
+    parser.add_argument("--width", type=int, default=2048)
+    parser.add_argument("--height", type=int, default=1536)
+    parser.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR))
+
+    args = parser.parse_args()
+
+    from compact_format import load_analysis
+
+    diagrams: dict[str, str] = {}
+    for input_file in args.inputs:
+        if input_file.endswith(".mmd"):
+            diagrams[Path(input_file).stem] = Path(input_file).read_text()
+            continue
+        data = load_analysis(input_file)
+        diagrams.update(generate_all(load_plan(data), args.flow_style))
+
+    if not args.out_dir:
+        if args.render:
+            print("Error: --render requires --out-dir", file=sys.stderr)
+            sys.exit(1)
+        print("\n".join(diagrams.values()), end="")
+        return
+
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for stem, source in diagrams.items():
+        target = out_dir / f"{stem}.mmd"
+        if target.exists() and target.read_text() == source:
+            continue
+        target.write_text(source)
+        print(f"Wrote {target}", file=sys.stderr)
+
+    if args.render:
+        rendered = render_all(diagrams, out_dir, args.format, args.width, args.height, Path(args.cache_dir))
+        for stem, path in rendered.items():
+            print(f"Rendered {path}", file=sys.stderr)
+        if len(rendered) < len(diagrams):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""Summarize oversized module graphs into diagram-sized ones.
+
+Clusters the module connection graph (weighted Louvain community detection,
+near-linear in edges per pass), then merges the smallest clusters into their
+most-connected neighbour until at most --max-nodes remain. Each cluster
+becomes one module record (with a ``members`` list) and connections are
+aggregated between clusters, so the result is still analyze_codebase.py
+output that compile_plan.py and generate_mermaid.py accept unchanged.
+
+Membership is kept in the summary's ``clusters`` list; ``--cluster NAME``
+returns the original analysis restricted to one cluster's members for a
+C2/C3 drill-down view.
+
+Usage:
+    python graph_summary.py <analysis.json|-> --max-nodes 20 [--output summary.json]
+    python graph_summary.py <analysis.json|-> --max-nodes 20 --cluster billing
+"""
+from __future__ import annotations
+
+import heapq
+import json
+import sys
+
+# Path segments too generic to name a cluster after.
+GENERIC_SEGMENTS = {"src", "lib", "pkg", "packages", "apps", "services", "internal", "cmd", "modules"}
+
+
+def module_graph(analysis: dict) -> dict[str, dict[str, float]]:
+    """Undirected weighted adjacency between modules (weight = importing files)."""
+    from compile_plan import aggregate_connections
+
+    names = {m["name"] for m in analysis.get("modules", [])}
+    adjacency: dict[str, dict[str, float]] = {name: {} for name in names}
+    for (origin, target), entry in aggregate_connections(analysis.get("connections", [])).items():
+        if origin == target or origin not in names or target not in names:
+            continue
+        weight = entry["files"] or entry["imports"]
+        adjacency[origin][target] = adjacency[origin].get(target, 0) + weight
+        adjacency[target][origin] = adjacency[target].get(origin, 0) + weight
+    return adjacency
+
+
+def louvain(adjacency: dict[str, dict[str, float]], max_passes: int = 20) -> dict[str, str]:
+    """Weighted Louvain community detection; returns node -> community label.
+
+    Each level moves nodes to the neighbouring community with the best
+    modularity gain until no move helps, then collapses communities into
+    nodes and repeats. Deterministic: nodes are visited in sorted order and
+    ties keep the current community.
+    """
+    labels = {node: node for node in adjacency}
+    graph = {node: dict(nbrs) for node, nbrs in adjacency.items()}
+    while True:
+        degree = {n: sum(nbrs.values()) for n, nbrs in graph.items()}
+        total = sum(degree.values())
+        if not total:
+            return labels
+        community = {n: n for n in graph}
+        tot = dict(degree)
+        moved_any = False
+        for _ in range(max_passes):
+            moved = False
+            for node in sorted(graph):
+                current = community[node]
+                k = degree[node]
+                tot[current] -= k
+                links: dict[str, float] = {}
+                for nbr, weight in graph[node].items():
+                    if nbr != node:
+                        links[community[nbr]] = links.get(community[nbr], 0) + weight
+                best, best_gain = current, links.get(current, 0) - tot[current] * k / total
+                for cand in sorted(links):
+                    gain = links[cand] - tot[cand] * k / total
+                    if gain > best_gain + 1e-12:
+                        best, best_gain = cand, gain
+                tot[best] += k
+                if best != current:
+                    community[node] = best
+                    moved = moved_any = True
+            if not moved:
+                break
+        if not moved_any:
+            return labels
+        labels = {n: community[c] for n, c in labels.items()}
+        collapsed: dict[str, dict[str, float]] = {c: {} for c in set(community.values())}
+        for node, nbrs in graph.items():
+            a = community[node]
+            for nbr, weight in nbrs.items():
+                b = community[nbr]
+                collapsed[a][b] = collapsed[a].get(b, 0) + weight
+        graph = collapsed
+
+
+def _common_path(paths: list[str]) -> str:
+    parts = [p.split("/") for p in paths]
+    prefix = []
+    for segment in zip(*parts):
+        if len(set(segment)) != 1:
+            break
+        prefix.append(segment[0])
+    return "/".join(prefix)
+
+
+def _shared_depth(a: str, b: str) -> int:
+    common = _common_path([a, b])
+    return common.count("/") + 1 if common else 0
+
+
+def merge_to_budget(modules: list[dict], adjacency: dict[str, dict[str, float]],
+                    labels: dict[str, str], max_nodes: int) -> list[list[str]]:
+    """Merge communities until at most max_nodes remain; returns member lists.
+
+    Unconnected modules are first grouped by parent directory. Then the
+    smallest cluster (by code files) goes first: into the neighbour it is most
+    connected to relative to that neighbour's size, or, if isolated, into the smallest cluster sharing the
+    longest path prefix.
+    """
+    by_name = {m["name"]: m for m in modules}
+    clusters: dict[str, list[str]] = {}
+    for name in sorted(labels):
+        # Unconnected modules start out grouped by parent directory.
+        label = labels[name] if adjacency[name] else "dir:" + by_name[name]["path"].rpartition("/")[0]
+        clusters.setdefault(label, []).append(name)
+    labels = {name: c for c, members in clusters.items() for name in members}
+    size = {c: sum(by_name[n].get("file_count", 0) for n in members) for c, members in clusters.items()}
+    prefix = {c: _common_path([by_name[n]["path"] for n in members]) for c, members in clusters.items()}
+    links: dict[str, dict[str, float]] = {c: {} for c in clusters}
+    for name, nbrs in adjacency.items():
+        a = labels[name]
+        for nbr, weight in nbrs.items():
+            b = labels[nbr]
+            if a != b:
+                links[a][b] = links[a].get(b, 0) + weight
+
+    heap = [(size[c], c) for c in clusters]
+    heapq.heapify(heap)
+    while len(clusters) > max(max_nodes, 1) and heap:
+        s, c = heapq.heappop(heap)
+        if c not in clusters or s != size[c]:
+            continue
+        if links[c]:
+            # Average linkage: weight per code file, so a growing cluster does not absorb everything.
+            target = max(links[c], key=lambda o: (links[c][o] / max(size[o], 1), -size[o], o))
+        else:
+            target = max((o for o in clusters if o != c),
+                         key=lambda o: (_shared_depth(prefix[c], prefix[o]), -size[o], o))
+        # Fold the smaller adjacency into the larger one.
+        keep, drop = (target, c) if len(links[target]) >= len(links[c]) else (c, target)
+        for other, weight in links.pop(drop).items():
+            links[other].pop(drop, None)
+            if other != keep:
+                links[keep][other] = links[keep].get(other, 0) + weight
+                links[other][keep] = links[other].get(keep, 0) + weight
+        links[keep].pop(drop, None)
+        clusters[keep] = sorted(clusters[keep] + clusters.pop(drop))
+        size[keep] += size.pop(drop)
+        prefix[keep] = _common_path([prefix[keep], prefix.pop(drop)])
+        heapq.heappush(heap, (size[keep], keep))
+    return sorted(clusters.values(), key=lambda members: members[0])
+
+
+def cluster_name(members: list[dict], used: set[str]) -> str:
+    """Name a cluster after its members' common directory, else its largest member."""
+    segments = [s for s in _common_path([m["path"] for m in members]).split("/") if s]
+    name = segments[-1] if segments and segments[-1] not in GENERIC_SEGMENTS else ""
+    if not name or name in used:
+        largest = max(members, key=lambda m: (m.get("file_count", 0), m["name"]))
+        name = f"{largest['name']} group"
+    candidate, n = name, 2
+    while candidate in used:
+        candidate, n = f"{name} {n}", n + 1
+    used.add(candidate)
+    return candidate
+
+
+def summarize(analysis: dict, max_nodes: int) -> dict:
+    """Return the analysis collapsed to at most max_nodes module nodes.
+
+    Analyses already within budget are returned unchanged.
+    """
+    from analyze_codebase import CONNECTION_EXAMPLES
+    from compile_plan import aggregate_connections
+
+    modules = analysis.get("modules", [])
+    if len(modules) <= max_nodes:
+        return analysis
+    adjacency = module_graph(analysis)
+    groups = merge_to_budget(modules, adjacency, louvain(adjacency), max_nodes)
+
+    by_name = {m["name"]: m for m in modules}
+    used = {group[0] for group in groups if len(group) == 1}
+    owner: dict[str, str] = {}
+    summary_modules, clusters = [], []
+    for group in groups:
+        members = [by_name[n] for n in group]
+        if len(members) == 1:
+            summary_modules.append(members[0])
+            owner[group[0]] = group[0]
+            continue
+        name = cluster_name(members, used)
+        languages: dict[str, int] = {}
+        for m in members:
+            for ext, count in m.get("languages", {}).items():
+                languages[ext] = languages.get(ext, 0) + count
+        summary_modules.append({
+            "name": name,
+            "path": _common_path([m["path"] for m in members]),
+            "type": "module group",
+            "file_count": sum(m.get("file_count", 0) for m in members),
+            "languages": dict(sorted(languages.items(), key=lambda x: -x[1])),
+            "has_own_manifest": any(m.get("has_own_manifest") for m in members),
+            "has_dockerfile": any(m.get("has_dockerfile") for m in members),
+            "is_deployable": any(m.get("is_deployable") for m in members),
+            "members": group,
+        })
+        clusters.append({"name": name, "members": group})
+        for n in group:
+            owner[n] = name
+
+    # Inter-cluster edges: one per cluster pair, summing imports and files.
+    merged: dict[tuple[str, str], dict] = {}
+    for (origin, target), entry in aggregate_connections(analysis.get("connections", [])).items():
+        a, b = owner.get(origin), owner.get(target)
+        if a and b and a != b:
+            edge = merged.setdefault((a, b), {"imports": 0, "files": 0, "examples": []})
+            edge["imports"] += entry["imports"]
+            edge["files"] += entry["files"]
+            edge["examples"] += entry["examples"][:CONNECTION_EXAMPLES - len(edge["examples"])]
+
+    technologies = []
+    for tech in analysis.get("technologies", []):
+        tech = dict(tech)
+        if "modules" in tech:
+            tech["modules"] = sorted({owner.get(m, m) for m in tech["modules"]})
+        technologies.append(tech)
+
+    return {
+        **analysis,
+        "modules": summary_modules,
+        "connections": [
+            {"from": a, "to": b, "imports": e["imports"], "files": e["files"], "examples": e["examples"]}
+            for (a, b), e in sorted(merged.items())
+        ],
+        "technologies": technologies,
+        "clusters": clusters,
+    }
+
+
+def drill_down(analysis: dict, summary: dict, cluster: str) -> dict:
+    """The original analysis restricted to one cluster's members."""
+    members = next((c["members"] for c in summary.get("clusters", []) if c["name"] == cluster), None)
+    if members is None:
+        raise KeyError(cluster)
+    keep = set(members)
+    project = dict(analysis.get("project", {}))
+    project["name"] = f"{project.get('name') or 'System'} / {cluster}"
+    technologies = [
+        t for t in analysis.get("technologies", [])
+        if not t.get("modules") or keep.intersection(t["modules"])
+    ]
+    restricted = {
+        **analysis,
+        "project": project,
+        "modules": [m for m in analysis.get("modules", []) if m["name"] in keep],
+        "connections": [c for c in analysis.get("connections", []) if c["from"] in keep and c["to"] in keep],
+        "technologies": technologies,
+        "manifests": [m for m in analysis.get("manifests", []) if m.get("module") in keep],
+    }
+    restricted.pop("clusters", None)
+    return restricted
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Cluster a large module graph into a diagram-sized model")
+    parser.add_argument("analysis_file", help="Path to analyze_codebase.py output (plain or compact, "
+                                              "optionally gzipped), or - for stdin")
+    parser.add_argument("--max-nodes", type=int, required=True, help="Maximum module nodes in the summary")
+    parser.add_argument("--cluster", help="Output the drill-down analysis for one cluster instead")
+    parser.add_argument("--output", "-o", help="Write to this file instead of stdout")
+    parser.add_argument("--compact", action="store_true", help="Write the compact interned format (compact_format.py)")
+    parser.add_argument("--gzip", action="store_true", help="Gzip the output")
+
+    args = parser.parse_args()
+
+    from compact_format import dumps, load_analysis
+
+    analysis = load_analysis(args.analysis_file)
+
+    summary = summarize(analysis, args.max_nodes)
+    result = summary
+    if args.cluster:
+        try:
+            result = drill_down(analysis, summary, args.cluster)
+        except KeyError:
+            names = ", ".join(c["name"] for c in summary.get("clusters", [])) or "none"
+            print(f"Error: no cluster named {args.cluster!r} (clusters: {names})", file=sys.stderr)
+            sys.exit(1)
+    else:
+        print(f"{len(analysis.get('modules', []))} modules -> {len(summary['modules'])} nodes "
+              f"({len(summary.get('clusters', []))} clusters)", file=sys.stderr)
+
+    if args.compact or args.gzip:
+        data = dumps(result, args.compact, args.gzip)
+        if args.output:
+            with open(args.output, "wb") as f:
+                f.write(data)
+        else:
+            sys.stdout.buffer.write(data)
+        return
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Multi-repository analysis merged into one landscape model.
+
+Each repository is analyzed in its own worker process (analyze_codebase.py's
+Analyzer) and cached per repository: the cache key is a fingerprint of every
+indexed file's path, mtime and size, so unchanged repositories are loaded
+from disk and only changed ones are re-analyzed.
+
+The merged result has the usual analysis shape with one module per
+repository, so compile_plan.py, generate_mermaid.py and graph_summary.py work
+on it directly. Cross-repository connections come from published package
+names (package.json ``name``, pyproject/setup.py name, go.mod module path,
+Cargo and composer names) appearing in another repository's dependencies.
+
+A repository list file holds one path per line (``#`` comments allowed), or a
+JSON list of paths or ``{"path": ..., "name": ...}`` objects; relative paths
+are resolved against the list file's directory.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+CACHE_VERSION = 2
+DEFAULT_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "architecture-diagram-skill" / "repos"
+
+# Ecosystems whose manifest name is what other repositories depend on.
+PUBLISHING_ECOSYSTEMS = {"node", "python", "go", "rust", "php"}
+
+
+def read_repo_list(file: Path | str) -> list[tuple[str | None, Path]]:
+    """(name or None, path) pairs from a repository list file."""
+    file = Path(file)
+    text = file.read_text()
+    base = file.resolve().parent
+    if text.lstrip().startswith("["):
+        entries = [e if isinstance(e, dict) else {"path": e} for e in json.loads(text)]
+    else:
+        entries = [{"path": line.strip()} for line in text.splitlines()
+                   if line.strip() and not line.strip().startswith("#")]
+    return [(e.get("name"), (base / e["path"]).resolve()) for e in entries]
+
+
+def repo_names(repos: list[tuple[str | None, Path]]) -> list[str]:
+    """Unique display names: explicit name, else directory name, else parent/dir."""
+    names = []
+    taken: set[str] = set()
+    counts: dict[str, int] = {}
+    for name, path in repos:
+        if not name:
+            counts[path.name] = counts.get(path.name, 0) + 1
+    for name, path in repos:
+        if not name:
+            name = path.name if counts[path.name] == 1 else f"{path.parent.name}/{path.name}"
+        candidate, n = name, 2
+        while candidate in taken:
+            candidate, n = f"{name}-{n}", n + 1
+        taken.add(candidate)
+        names.append(candidate)
+    return names
+
+
+def _cache_file(cache_dir: Path, path: Path) -> Path:
+    digest = hashlib.sha256(str(path).encode()).hexdigest()[:16]
+    return cache_dir / f"{path.name}-{digest}.json"
+
+
+def _fingerprint(idx, rules_file: str | None) -> str:
+    digest = hashlib.sha256(f"{CACHE_VERSION}\0{rules_file or ''}".encode())
+    for rel in idx.files:
+        try:
+            st = os.stat(idx.root / rel)
+        except OSError:
+            continue
+        digest.update(f"{rel}\0{st.st_mtime_ns}\0{st.st_size}\n".encode())
+    return digest.hexdigest()
+
+
+def analyze_repo(path: str, rules_file: str | None = None, cache_dir: str | None = None) -> tuple[dict, bool]:
+    """Analyze one repository, reusing its cached result if nothing changed.
+
+    Returns (analysis dict, served from cache). Runs in a worker process.
+    """
+    from analyze_codebase import Analyzer, write_atomic
+
+    root = Path(path).resolve()
+    analyzer = Analyzer(rules_file)
+    fingerprint = _fingerprint(analyzer.index(root), rules_file)
+    cache_file = _cache_file(Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR, root)
+    try:
+        with open(cache_file) as f:
+            cached = json.load(f)
+        if cached.get("fingerprint") == fingerprint:
+            return cached["analysis"], True
+    except (OSError, json.JSONDecodeError):
+        pass
+    result = analyzer.analyze(root).to_dict()
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    write_atomic(cache_file, json.dumps({"fingerprint": fingerprint, "analysis": result}))
+    return result, False
+
+
+def analyze_repos(repos: list[tuple[str | None, Path]], rules_file: str | None = None,
+                  cache_dir: str | None = None, jobs: int | None = None) -> list[tuple[str, dict, bool]]:
+    """Analyze repositories concurrently; returns (name, analysis, cached) in input order."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    names = repo_names(repos)
+    paths = [str(p) for _, p in repos]
+    workers = max(1, min(jobs or os.cpu_count() or 1, len(paths)))
+    if workers == 1:
+        results = [analyze_repo(p, rules_file, cache_dir) for p in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(analyze_repo, paths, [rules_file] * len(paths), [cache_dir] * len(paths)))
+    return [(name, analysis, cached) for name, (analysis, cached) in zip(names, results)]
+
+
+def _package_key(ecosystem: str, name: str) -> str:
+    from manifests import normalize_python_name
+    return normalize_python_name(name) if ecosystem == "python" else name.lower()
+
+
+def merge_landscape(results: list[tuple[str, dict, bool]], name: str = "Landscape") -> dict:
+    """Merge per-repository analyses into one analysis with a module per repository."""
+    published: dict[tuple[str, str], str] = {}
+    for repo, analysis, _ in results:
+        for manifest in analysis.get("manifests", []):
+            if manifest["ecosystem"] in PUBLISHING_ECOSYSTEMS and manifest.get("name"):
+                published.setdefault((manifest["ecosystem"], _package_key(manifest["ecosystem"], manifest["name"])), repo)
+
+    modules, entry_points, manifests, repositories = [], [], [], []
+    connections: dict[tuple[str, str], dict] = {}
+    technologies: dict[str, dict] = {}
+    dependencies: dict[str, list[str]] = {"node": [], "python": []}
+    types: list[str] = []
+
+    for repo, analysis, cached in results:
+        project = analysis.get("project", {})
+        repo_modules = analysis.get("modules", [])
+        types += [t for t in project.get("types", []) if t not in types]
+        languages: dict[str, int] = {}
+        for mod in repo_modules:
+            for ext, count in mod.get("languages", {}).items():
+                languages[ext] = languages.get(ext, 0) + count
+        repo_manifests = analysis.get("manifests", [])
+        modules.append({
+            "name": repo,
+            "path": project.get("path", ""),
+            "type": "repository",
+            "file_count": sum(m.get("file_count", 0) for m in repo_modules),
+            "languages": dict(sorted(languages.items(), key=lambda x: -x[1])),
+            "has_own_manifest": bool(repo_manifests),
+            "has_dockerfile": any(m.get("has_dockerfile") for m in repo_modules)
+                              or any(t["name"] == "Docker" for t in analysis.get("technologies", [])),
+            "is_deployable": any(m.get("is_deployable") for m in repo_modules),
+        })
+        repositories.append({
+            "name": repo,
+            "path": project.get("path", ""),
+            "project": project.get("name", repo),
+            "description": project.get("description", ""),
+            "published": sorted({m["name"] for m in repo_manifests
+                                 if m["ecosystem"] in PUBLISHING_ECOSYSTEMS and m.get("name")}),
+            "modules": [m["name"] for m in repo_modules],
+            "cached": cached,
+        })
+        for entry in analysis.get("entry_points", []):
+            entry_points.append({**entry, "file": f"{repo}/{entry['file']}",
+                                 "directory": f"{repo}/{entry['directory']}"})
+        for manifest in repo_manifests:
+            manifests.append({**manifest, "path": f"{repo}/{manifest['path']}", "module": repo})
+            for dep in manifest.get("dependencies", []) + manifest.get("dev_dependencies", []):
+                target = published.get((manifest["ecosystem"], _package_key(manifest["ecosystem"], dep)))
+                if target and target != repo:
+                    edge = connections.setdefault((repo, target), {"from": repo, "to": target, "imports": 0,
+                                                                   "files": 0, "examples": [], "packages": []})
+                    edge["imports"] += 1
+                    if f"{repo}/{manifest['path']}" not in edge["examples"]:
+                        edge["files"] += 1
+                        edge["examples"].append(f"{repo}/{manifest['path']}")
+                    if dep not in edge["packages"]:
+                        edge["packages"].append(dep)
+        for tech in analysis.get("technologies", []):
+            merged = technologies.setdefault(tech["name"], {**tech, "modules": [], "sources": []})
+            if repo not in merged["modules"]:
+                merged["modules"].append(repo)
+            merged["sources"] += [s for s in tech.get("sources", []) if s not in merged["sources"]]
+        for ecosystem, deps in analysis.get("dependencies", {}).items():
+            bucket = dependencies.setdefault(ecosystem, [])
+            bucket.extend(d for d in deps if d not in bucket)
+
+    return {
+        "project": {
+            "path": os.path.commonpath([r["path"] for r in repositories]) if repositories else "",
+            "name": name,
+            "description": f"{len(repositories)} repositories",
+            "types": types,
+        },
+        "modules": modules,
+        "entry_points": entry_points,
+        "connections": [connections[k] for k in sorted(connections)],
+        "technologies": sorted(technologies.values(), key=lambda t: t["name"].lower()),
+        "dependencies": dependencies,
+        "manifests": manifests,
+        "repositories": repositories,
+    }
@@ -0,0 +1,351 @@
+"""Dependency manifest parsers for analyze_codebase.py.
+
+Every parser takes the manifest path and returns a dict with the same keys:
+name, description, dependencies, devDependencies (plus ecosystem-specific
+extras such as package.json scripts). Parsers never raise on malformed input;
+they return whatever could be read.
+
+Python 3.10 has no tomllib; TOML manifests then fall back to a small
+section-aware reader that handles the common manifest layouts.
+"""
+from __future__ import annotations
+
+import json
+import re
+from pathlib import Path
+
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python 3.10
+    tomllib = None
+
+PYTHON_REQUIREMENT_NAME = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)")
+
+
+def _result(name="", description="", dependencies=(), dev_dependencies=(), **extra) -> dict:
+    return {
+        "name": name if isinstance(name, str) else "",
+        "description": description if isinstance(description, str) else "",
+        "dependencies": list(dict.fromkeys(dependencies)),
+        "devDependencies": list(dict.fromkeys(dev_dependencies)),
+        **extra,
+    }
+
+
+def _read(file: Path) -> str:
+    try:
+        return file.read_text(encoding="utf-8", errors="ignore")
+    except OSError:
+        return ""
+
+
+def _table(value) -> dict:
+    """A manifest section that should be a table; anything else reads as empty."""
+    return value if isinstance(value, dict) else {}
+
+
+def _names(value) -> list[str]:
+    """Package names from a dependency section: table keys or a list of strings."""
+    if isinstance(value, dict):
+        return [k for k in value if isinstance(k, str)]
+    if isinstance(value, list):
+        return [v for v in value if isinstance(v, str)]
+    return []
+
+
+def _load_json(file: Path) -> dict:
+    try:
+        data = json.loads(_read(file))
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def normalize_python_name(name: str) -> str:
+    """PEP 503 normalization (``Flask_SQLAlchemy`` -> ``flask-sqlalchemy``)."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def python_requirement_name(spec: str) -> str | None:
+    """Project name from a PEP 508 requirement string, or None."""
+    match = PYTHON_REQUIREMENT_NAME.match(spec)
+    return normalize_python_name(match.group(1)) if match else None
+
+
+def _load_toml(file: Path) -> dict:
+    text = _read(file)
+    if tomllib is not None:
+        try:
+            return tomllib.loads(text)
+        except tomllib.TOMLDecodeError:
+            return {}
+    return _load_toml_fallback(text)
+
+
+def _toml_strings(text: str) -> list[str]:
+    return [a or b for a, b in re.findall(r'"([^"]*)"|\'([^\']*)\'', text)]
+
+
+def _load_toml_fallback(text: str) -> dict:
+    """Minimal TOML reader: tables, string values and string arrays."""
+    data: dict = {}
+    table = data
+    pending_key = None
+    pending_items: list[str] = []
+    for raw in text.splitlines():
+        line = raw.split(" #", 1)[0].strip()
+        if pending_key is not None:
+            pending_items += _toml_strings(line)
+            if "]" in line:
+                table[pending_key] = pending_items
+                pending_key = None
+            continue
+        if not line or line.startswith("#"):
+            continue
+        header = re.match(r"^\[\[?([^\]]+)\]\]?$", line)
+        if header:
+            table = data
+            for part in header.group(1).strip().split("."):
+                part = part.strip().strip('"')
+                if not isinstance(table.get(part), dict):
+                    table[part] = {}
+                table = table[part]
+            continue
+        kv = re.match(r'^([A-Za-z0-9_.\-"]+)\s*=\s*(.*)$', line)
+        if not kv:
+            continue
+        key, value = kv.group(1).strip('"'), kv.group(2).strip()
+        if value.startswith("[") and "]" not in value:
+            pending_key, pending_items = key, _toml_strings(value)
+        elif value.startswith("["):
+            table[key] = _toml_strings(value)
+        elif value.startswith(("\"", "'")):
+            table[key] = value[1:].split(value[0], 1)[0]
+        elif value.startswith("{"):
+            table[key] = {}
+        else:
+            table[key] = value
+    return data
+
+
+# ---------------------------------------------------------------------------
+# Node / PHP (JSON manifests)
+# ---------------------------------------------------------------------------
+
+def parse_package_json(file: Path) -> dict:
+    """Extract info from package.json."""
+    pkg = _load_json(file)
+    if not pkg:
+        return {}
+    main = pkg.get("main", "")
+    return _result(
+        pkg.get("name"),
+        pkg.get("description"),
+        _names(pkg.get("dependencies")),
+        _names(pkg.get("devDependencies")),
+        scripts=list(_table(pkg.get("scripts"))),
+        main=main if isinstance(main, str) else "",
+    )
+
+
+def parse_composer_json(file: Path) -> dict:
+    """Extract info from composer.json (platform requirements like php/ext-* skipped)."""
+    pkg = _load_json(file)
+    if not pkg:
+        return {}
+
+    def packages(section: str) -> list[str]:
+        return [p for p in _names(pkg.get(section)) if "/" in p]
+
+    return _result(pkg.get("name"), pkg.get("description"), packages("require"), packages("require-dev"))
+
+
+# ---------------------------------------------------------------------------
+# Python
+# ---------------------------------------------------------------------------
+
+def parse_requirements(file: Path) -> list[str]:
+    """Extract dependency names from a requirements file."""
+    deps = []
+    for line in _read(file).splitlines():
+        line = line.strip()
+        if line and not line.startswith("#") and not line.startswith("-"):
+            name = python_requirement_name(line)
+            if name:
+                deps.append(name)
+    return deps
+
+
+def parse_requirements_manifest(file: Path) -> dict:
+    deps = parse_requirements(file)
+    if re.search(r"(dev|test|lint|doc)", file.name):
+        return _result(dev_dependencies=deps)
+    return _result(dependencies=deps)
+
+
+def parse_pyproject(file: Path) -> dict:
+    """Extract info from pyproject.toml (PEP 621 and Poetry layouts)."""
+    data = _load_toml(file)
+    project = _table(data.get("project"))
+    poetry = _table(_table(data.get("tool")).get("poetry"))
+
+    deps = [python_requirement_name(d) for d in _names(project.get("dependencies"))]
+    dev = []
+    for group in _table(project.get("optional-dependencies")).values():
+        dev += [python_requirement_name(d) for d in _names(group)]
+    for group in _table(data.get("dependency-groups")).values():
+        dev += [python_requirement_name(d) for d in _names(group)]
+
+    deps += [normalize_python_name(k) for k in _names(poetry.get("dependencies")) if k != "python"]
+    dev += [normalize_python_name(k) for k in _names(poetry.get("dev-dependencies"))]
+    for group in _table(poetry.get("group")).values():
+        dev += [normalize_python_name(k) for k in _names(_table(group).get("dependencies"))]
+
+    return _result(
+        project.get("name") or poetry.get("name"),
+        project.get("description") or poetry.get("description"),
+        [d for d in deps if d],
+        [d for d in dev if d],
+    )
+
+
+def parse_setup_py(file: Path) -> dict:
+    """Best-effort static read of setup(name=..., install_requires=[...])."""
+    text = _read(file)
+    name = re.search(r"""name\s*=\s*["']([^"']+)["']""", text)
+    desc = re.search(r"""description\s*=\s*["']([^"']+)["']""", text)
+    deps = []
+    block = re.search(r"install_requires\s*=\s*\[(.*?)\]", text, re.S)
+    if block:
+        deps = [python_requirement_name(s) for s in re.findall(r"""["']([^"']+)["']""", block.group(1))]
+    return _result(name and name.group(1), desc and desc.group(1), [d for d in deps if d])
+
+
+# ---------------------------------------------------------------------------
+# Go / Rust
+# ---------------------------------------------------------------------------
+
+def parse_go_mod(file: Path) -> dict:
+    """Extract the module path and required modules from go.mod."""
+    name = ""
+    deps, indirect = [], []
+    in_block = False
+    for raw in _read(file).splitlines():
+        line = raw.strip()
+        if line.startswith("module "):
+            name = line.split()[1]
+        elif line.startswith("require ("):
+            in_block = True
+        elif in_block and line == ")":
+            in_block = False
+        elif in_block or line.startswith("require "):
+            parts = line.removeprefix("require ").split()
+            if parts and not parts[0].startswith("//"):
+                (indirect if "// indirect" in line else deps).append(parts[0])
+    return _result(name, "", deps, indirect)
+
+
+def parse_cargo_toml(file: Path) -> dict:
+    """Extract crate (or workspace) info from Cargo.toml."""
+    data = _load_toml(file)
+    package = _table(data.get("package"))
+    workspace = _table(data.get("workspace"))
+    deps = _names(data.get("dependencies")) + _names(workspace.get("dependencies"))
+    dev = _names(data.get("dev-dependencies")) + _names(data.get("build-dependencies"))
+    return _result(package.get("name"), package.get("description"), deps, dev)
+
+
+# ---------------------------------------------------------------------------
+# JVM
+# ---------------------------------------------------------------------------
+
+def parse_pom_xml(file: Path) -> dict:
+    """Extract artifact and dependencies (groupId:artifactId) from a Maven pom.xml."""
+    import xml.etree.ElementTree as ET
+
+    try:
+        root = ET.parse(file).getroot()
+    except (OSError, ET.ParseError):
+        return {}
+    ns = root.tag[: root.tag.index("}") + 1] if root.tag.startswith("{") else ""
+
+    def text(node, tag: str) -> str:
+        child = node.find(f"{ns}{tag}")
+        return (child.text or "").strip() if child is not None else ""
+
+    deps, dev = [], []
+    for dep in root.iterfind(f"{ns}dependencies/{ns}dependency"):
+        coord = f"{text(dep, 'groupId')}:{text(dep, 'artifactId')}"
+        (dev if text(dep, "scope") == "test" else deps).append(coord)
+    return _result(text(root, "artifactId"), text(root, "description") or text(root, "name"), deps, dev)
+
+
+GRADLE_DEPENDENCY = re.compile(
+    r"""\b(\w+)\s*\(?\s*["']([\w.\-]+):([\w.\-]+)(?::[^"']*)?["']"""
+)
+GRADLE_TEST_CONFIGS = ("test", "androidTest")
+
+
+def parse_gradle(file: Path) -> dict:
+    """Extract dependencies (group:artifact) from build.gradle / build.gradle.kts."""
+    deps, dev = [], []
+    for config, group, artifact in GRADLE_DEPENDENCY.findall(_read(file)):
+        if config in ("id", "classpath", "version"):
+            continue
+        (dev if config.startswith(GRADLE_TEST_CONFIGS) else deps).append(f"{group}:{artifact}")
+    settings = file.parent / "settings.gradle"
+    name = ""
+    for candidate in (settings, file.parent / "settings.gradle.kts"):
+        match = re.search(r"""rootProject\.name\s*=\s*["']([^"']+)["']""", _read(candidate)) if candidate.exists() else None
+        if match:
+            name = match.group(1)
+            break
+    return _result(name, "", deps, dev)
+
+
+# ---------------------------------------------------------------------------
+# Ruby
+# ---------------------------------------------------------------------------
+
+def parse_gemfile(file: Path) -> dict:
+    """Extract gem names from a Gemfile (gems in test/development groups are dev)."""
+    deps, dev = [], []
+    group_depth = 0
+    dev_group = False
+    for raw in _read(file).splitlines():
+        line = raw.strip()
+        if line.startswith("group "):
+            group_depth += 1
+            dev_group = bool(re.search(r":(test|development)", line))
+        elif line == "end" and group_depth:
+            group_depth -= 1
+            dev_group = False
+        else:
+            match = re.match(r"""gem\s+["']([^"']+)["']""", line)
+            if match:
+                (dev if dev_group else deps).append(match.group(1))
+    return _result("", "", deps, dev)
+
+
+MANIFEST_PARSERS = {
+    "package.json": ("node", parse_package_json),
+    "pyproject.toml": ("python", parse_pyproject),
+    "setup.py": ("python", parse_setup_py),
+    "go.mod": ("go", parse_go_mod),
+    "Cargo.toml": ("rust", parse_cargo_toml),
+    "pom.xml": ("java", parse_pom_xml),
+    "build.gradle": ("java", parse_gradle),
+    "build.gradle.kts": ("java", parse_gradle),
+    "composer.json": ("php", parse_composer_json),
+    "Gemfile": ("ruby", parse_gemfile),
+}
+
+
+def manifest_kind(filename: str):
+    """Return (ecosystem, parser) for a manifest file name, or None."""
+    kind = MANIFEST_PARSERS.get(filename)
+    if kind:
+        return kind
+    if filename.startswith("requirements") and filename.endswith(".txt"):
+        return ("python", parse_requirements_manifest)
+    return None
@@ -37,11 +37,21 @@ Plan JSON format:
   "diagram": {
     "name": "System Context",
     "type": "context-diagram"
-  }
+  },
+  "flows": [
+    {"name": "Checkout", "diagramRef": "_new_", "steps": [...]}
+  ]
 }
 
 The "ref" field is a local reference used to link connections to objects.
 It is NOT sent to IcePanel — only used to resolve originId/targetId.
+
+Flows are resolved together once everything else exists: step refs, nested
+parentId/paths trees and subflow steps that point at other flows in the plan
+(``flowRef``). Steps whose refs do not resolve are reported, not sent. Flows
+longer than MAX_FLOW_STEPS are split into part flows joined by subflow steps,
+and ready flows are created concurrently. Every write goes through a shared
+limiter that keeps the push under IcePanel's write rate limit.
 """
 
 from __future__ import annotations
@@ -49,14 +59,54 @@ from __future__ import annotations
 import json
 import os
 import sys
+import threading
+import time
 import urllib.request
 import urllib.error
+from collections import deque
 
 API_BASE = os.environ.get("ICEPANEL_API_BASE_URL", "https://api.icepanel.io/v1")
 
+# IcePanel allows 60 POST/PUT/PATCH/DELETE requests per minute (GET/HEAD: 2,400).
+WRITE_LIMIT_PER_MINUTE = 60
+# Flows with more steps than this are split into part flows referenced as subflows.
+MAX_FLOW_STEPS = 40
+FLOW_WORKERS = 4
+
+FLOW_FIELDS = ("index", "pinned", "showAllSteps", "showConnectionNames", "labels", "handleId")
+STEP_FIELDS = ("detailedDescription", "originId", "targetId", "viaId", "parentId", "flowId")
+STEP_REFS = (("originRef", "originId"), ("targetRef", "targetId"), ("viaRef", "viaId"))
+
+
+class RateLimiter:
+    """At most ``per_minute`` calls in any sliding minute, shared by all threads."""
+
+    def __init__(self, per_minute: int, window: float = 60.0):
+        self.per_minute = per_minute
+        self.window = window
+        self.calls: deque[float] = deque()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                while self.calls and now - self.calls[0] >= self.window:
+                    self.calls.popleft()
+                if len(self.calls) < self.per_minute:
+                    self.calls.append(now)
+                    return
+                wait = self.window - (now - self.calls[0])
+            time.sleep(wait)
+
+
+WRITE_LIMITER = RateLimiter(WRITE_LIMIT_PER_MINUTE)
+
 
 def api_request(method: str, path: str, api_key: str, body: dict | None = None) -> dict:
     """Make an authenticated request to IcePanel API."""
+    if method not in ("GET", "HEAD"):
+        WRITE_LIMITER.acquire()
     url = f"{API_BASE}{path}"
     data = json.dumps(body).encode() if body else None
 
@@ -248,7 +298,7 @@ def create_flow(api_key: str, landscape_id: str, flow: dict) -> dict:
         "diagramId": flow["diagramId"],
     }
 
-    for field in ["index", "pinned", "showAllSteps", "showConnectionNames", "labels", "handleId"]:
+    for field in FLOW_FIELDS:
         if field in flow and flow[field] is not None:
             payload[field] = flow[field]
 
@@ -264,7 +314,7 @@ def create_flow(api_key: str, landscape_id: str, flow: dict) -> dict:
                 "type": step["type"],
             }
 
-            for field in ["detailedDescription", "originId", "targetId", "viaId", "parentId", "flowId"]:
+            for field in STEP_FIELDS:
                 if field in step and step[field] is not None:
                     step_payload[field] = step[field]
 
@@ -284,30 +334,228 @@ def create_flow(api_key: str, landscape_id: str, flow: dict) -> dict:
     return result.get("flow", result)
 
 
-def resolve_flow_steps(flow: dict, ref_to_id: dict[str, str]) -> dict:
-    """Resolve ref-based originRef/targetRef in flow steps to model IDs."""
-    if "steps" not in flow:
-        return flow
+def _flow_keys(flows: list[dict]) -> list[str]:
+    """Unique key per plan flow: its ``ref``, else its name (numbered on repeats)."""
+    keys: list[str] = []
+    for flow in flows:
+        base = flow.get("ref") or flow["name"]
+        key, n = base, 2
+        while key in keys:
+            key, n = f"{base} ({n})", n + 1
+        keys.append(key)
+    return keys
+
+
+def resolve_flows(flows: list[dict], ref_to_id: dict[str, str],
+                  diagram_id: str | None = None) -> tuple[list[dict], list[str]]:
+    """Resolve every flow in the plan against one shared ref index.
+
+    The plan is left untouched. Returns (jobs, problems): a job holds the flow
+    ``payload`` (without steps), its resolved ``steps`` in index order,
+    ``parents`` (step id -> enclosing step id, for steps nested under a step
+    or one of its paths) and ``subflows`` (subflow step id -> key of the plan
+    flow it references; the created flow ID is filled in at submit time).
+    A step whose refs do not resolve is dropped together with the steps
+    nested under it; a flow without a diagram is dropped entirely.
+    """
+    keys = _flow_keys(flows)
+    flow_index: dict[str, str] = {}
+    for key, flow in zip(keys, flows):
+        flow_index.setdefault(key, key)
+        flow_index.setdefault(flow["name"], key)
+
+    jobs, problems = [], []
+    for key, flow in zip(keys, flows):
+        label = f"flow '{flow['name']}'"
+        diagram = flow.get("diagramId") or flow.get("diagramRef")
+        if diagram == "_new_":
+            diagram = diagram_id
+        if not diagram:
+            problems.append(f"{label}: no diagram to attach to, flow skipped")
+            continue
+        payload = {"name": flow["name"], "diagramId": diagram}
+        for field in FLOW_FIELDS:
+            if flow.get(field) is not None:
+                payload[field] = flow[field]
+
+        steps = sorted(flow.get("steps", []), key=lambda s: s.get("index", 0))
+        step_ids = {step["id"] for step in steps}
+        path_owner = {path.get("id", path_id): step["id"]
+                      for step in steps if isinstance(step.get("paths"), dict)
+                      for path_id, path in step["paths"].items()}
+
+        resolved: dict[str, dict] = {}
+        parents: dict[str, str] = {}
+        subflows: dict[str, str] = {}
+        dropped: set[str] = set()
+        for step in steps:
+            where = f"{label} step '{step['id']}'"
+            step_payload = {field: step[field] for field in ("description", "id", "index", "type")}
+            for field in STEP_FIELDS:
+                if step.get(field) is not None:
+                    step_payload[field] = step[field]
+            if step.get("paths"):
+                step_payload["paths"] = step["paths"]
+            errors = []
+            for ref_field, id_field in STEP_REFS:
+                ref = step.get(ref_field)
+                if not ref:
+                    continue
+                if ref in ref_to_id:
+                    step_payload[id_field] = ref_to_id[ref]
+                else:
+                    errors.append(f"{ref_field} '{ref}' not found")
+            parent = step.get("parentId")
+            if parent:
+                owner = parent if parent in step_ids else path_owner.get(parent)
+                if owner and owner != step["id"]:
+                    parents[step["id"]] = owner
+                else:
+                    errors.append(f"parentId '{parent}' not found")
+            if step["type"] == "subflow":
+                target = flow_index.get(step.get("flowRef") or "")
+                if target and target != key:
+                    subflows[step["id"]] = target
+                elif step.get("flowRef"):
+                    errors.append(f"flowRef '{step['flowRef']}' is not another flow in the plan")
+                elif not step.get("flowId"):
+                    errors.append("subflow step needs flowRef or flowId")
+            if errors:
+                problems.append(f"{where}: {'; '.join(errors)}, step dropped")
+                dropped.add(step["id"])
+            resolved[step["id"]] = step_payload
+
+        # Drop everything nested under a dropped step
+        changed = True
+        while changed:
+            changed = False
+            for step_id, owner in parents.items():
+                if owner in dropped and step_id not in dropped:
+                    problems.append(f"{label} step '{step_id}': enclosing step '{owner}' dropped, step dropped")
+                    dropped.add(step_id)
+                    changed = True
+
+        jobs.append({
+            "key": key,
+            "name": flow["name"],
+            "payload": payload,
+            "steps": [s for s in resolved.values() if s["id"] not in dropped],
+            "parents": {k: v for k, v in parents.items() if k not in dropped},
+            "subflows": {k: v for k, v in subflows.items() if k not in dropped},
+        })
+    return jobs, problems
+
 
-    for step in flow["steps"]:
-        # Resolve originRef -> originId
-        if "originRef" in step and step["originRef"]:
-            origin_ref = step["originRef"]
-            if origin_ref in ref_to_id:
-                step["originId"] = ref_to_id[origin_ref]
-            else:
-                print(f"  Warning: flow step originRef '{origin_ref}' not found", file=sys.stderr)
+def split_flow(job: dict, max_steps: int = MAX_FLOW_STEPS, level: int = 1) -> list[dict]:
+    """Split a job with more than ``max_steps`` steps into part flows.
 
-        # Resolve targetRef -> targetId
-        if "targetRef" in step and step["targetRef"]:
-            target_ref = step["targetRef"]
-            if target_ref in ref_to_id:
-                step["targetId"] = ref_to_id[target_ref]
-            else:
-                print(f"  Warning: flow step targetRef '{target_ref}' not found", file=sys.stderr)
+    Parts break only between top-level steps, so a branching step keeps its
+    nested children (a single branch larger than the cap stays whole). The
+    original flow becomes a list of subflow steps pointing at the parts, and
+    is split again if it is still too long; each level gets its own part
+    keys and names (``2.1``, ...). Parts come before the flows that reference
+    them.
+    """
+    if len(job["steps"]) <= max_steps:
+        return [job]
+    parents = job["parents"]
+
+    def top(step_id: str) -> str:
+        seen = {step_id}
+        while step_id in parents and parents[step_id] not in seen:
+            step_id = parents[step_id]
+            seen.add(step_id)
+        return step_id
+
+    groups: dict[str, list[dict]] = {}
+    for step in job["steps"]:
+        groups.setdefault(top(step["id"]), []).append(step)
+    chunks: list[list[dict]] = [[]]
+    for group in groups.values():
+        if chunks[-1] and len(chunks[-1]) + len(group) > max_steps:
+            chunks.append([])
+        chunks[-1].extend(group)
+    if len(chunks) == 1:
+        return [job]
+
+    parts, subflow_steps, subflows = [], [], {}
+    for n, chunk in enumerate(chunks, 1):
+        ids = {step["id"] for step in chunk}
+        part = str(n) if level == 1 else f"{level}.{n}"
+        part_key = f"{job['key']}/{part}"
+        payload = {**job["payload"], "name": f"{job['name']} ({part}/{len(chunks)})"}
+        if payload.get("handleId"):
+            payload["handleId"] = f"{payload['handleId']}-{part}"
+        parts.append({
+            "key": part_key,
+            "name": payload["name"],
+            "payload": payload,
+            "steps": [{**step, "index": i} for i, step in enumerate(chunk)],
+            "parents": {k: v for k, v in parents.items() if k in ids},
+            "subflows": {k: v for k, v in job["subflows"].items() if k in ids},
+        })
+        step_id = f"part_{n}"
+        subflow_steps.append({"description": payload["name"], "id": step_id, "index": n - 1, "type": "subflow"})
+        subflows[step_id] = part_key
+    parent = {**job, "steps": subflow_steps, "parents": {}, "subflows": subflows}
+    return parts + split_flow(parent, max_steps, level + 1)
+
+
+def _flow_with_subflow_ids(job: dict, created: dict[str, str], problems: list[str]) -> dict:
+    steps = []
+    for step in job["steps"]:
+        target = job["subflows"].get(step["id"])
+        if target is not None:
+            if target not in created:
+                problems.append(f"flow '{job['name']}' step '{step['id']}': subflow '{target}' was not created, step dropped")
+                continue
+            step = {**step, "flowId": created[target]}
+        steps.append(step)
+    return {**job["payload"], "steps": steps}
 
-    return flow
 
+def push_flows(api_key: str, landscape_id: str, jobs: list[dict],
+               workers: int = FLOW_WORKERS) -> tuple[list[dict], list[str]]:
+    """Create flows concurrently, each once the flows its subflow steps reference exist.
+
+    Returns (created flows in job order, problems). Flows caught in a subflow
+    cycle are created last with the cyclic subflow steps dropped.
+    """
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    order = {job["key"]: i for i, job in enumerate(jobs)}
+    pending = {job["key"]: job for job in jobs}
+    created: dict[str, str] = {}
+    finished: set[str] = set()
+    results, problems = [], []
+    running: dict = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        while pending or running:
+            ready = [job for job in pending.values()
+                     if all(dep in finished or dep not in order for dep in job["subflows"].values())]
+            if not ready and not running:
+                ready = list(pending.values())
+            for job in ready:
+                del pending[job["key"]]
+                flow = _flow_with_subflow_ids(job, created, problems)
+                print(f"Creating flow: {job['name']}...")
+                running[pool.submit(create_flow, api_key, landscape_id, flow)] = (job, len(flow["steps"]))
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                job, step_count = running.pop(future)
+                finished.add(job["key"])
+                try:
+                    flow_id = future.result().get("id", "?")
+                except Exception as e:
+                    problems.append(f"flow '{job['name']}': creation failed: {e}")
+                    print(f"  Warning: Failed to create flow '{job['name']}': {e}", file=sys.stderr)
+                    continue
+                created[job["key"]] = flow_id
+                results.append((order[job["key"]], {"id": flow_id, "name": job["name"], "steps": step_count}))
+                print(f"  Created: {flow_id} {job['name']} ({step_count} steps)")
+
+    return [flow for _, flow in sorted(results, key=lambda r: r[0])], problems
 
 def populate_diagram_content(
     api_key: str,
@@ -368,6 +616,8 @@ def main():
     parser.add_argument("--org-id", default=os.environ.get("ICEPANEL_ORGANIZATION_ID", os.environ.get("ORGANIZATION_ID")))
     parser.add_argument("--landscape-id", default=os.environ.get("ICEPANEL_LANDSCAPE_ID"))
     parser.add_argument("--dry-run", action="store_true", help="Show what would be created without calling API")
+    parser.add_argument("--jobs", type=int, default=FLOW_WORKERS,
+                        help=f"Flows created concurrently (default: {FLOW_WORKERS})")
 
     args = parser.parse_args()
 
@@ -431,6 +681,17 @@ def main():
                         print(f"{indent}[{step['index']}] ({step_type}) {desc} → paths: {', '.join(path_names)}")
                     else:
                         print(f"{indent}[{step['index']}] ({step_type}) {desc}")
+            # Resolve against the refs the push would create
+            refs = dict(plan.get("existing_refs", {}))
+            refs.update((o.get("ref", o["name"]), o.get("ref", o["name"])) for o in plan.get("objects", []))
+            jobs, problems = resolve_flows(plan["flows"], refs, "_new_" if plan.get("diagram") else None)
+            jobs = [part for job in jobs for part in split_flow(job)]
+            print(f"\nFlow submission ({len(jobs)} flows, up to {args.jobs} at a time):")
+            for job in jobs:
+                after = sorted(set(job["subflows"].values()))
+                print(f"  {job['name']}: {len(job['steps'])} steps" + (f" (after: {', '.join(after)})" if after else ""))
+            for problem in problems:
+                print(f"  Warning: {problem}")
         return
 
     # Get root object ID
@@ -529,32 +790,18 @@ def main():
             except Exception as e:
                 print(f"  Warning: Failed to populate diagram content: {e}", file=sys.stderr)
 
-    # Create flows if specified
-    created_flows = []
-    for flow_def in plan.get("flows", []):
-        # Resolve diagramRef to diagram ID
-        if "diagramRef" in flow_def and flow_def["diagramRef"] == "_new_" and created_diagram:
-            flow_def["diagramId"] = created_diagram["id"]
-        elif "diagramRef" in flow_def:
-            # diagramRef could be a known diagram ID passed directly
-            flow_def["diagramId"] = flow_def["diagramRef"]
-
-        if "diagramId" not in flow_def or not flow_def["diagramId"]:
-            print(f"  Warning: Flow '{flow_def['name']}' has no diagramId, skipping", file=sys.stderr)
-            continue
-
-        # Resolve step refs to model IDs
-        resolve_flow_steps(flow_def, ref_to_id)
-
-        print(f"Creating flow: {flow_def['name']}...")
-        try:
-            result = create_flow(args.api_key, landscape_id, flow_def)
-            flow_id = result.get("id", "?")
-            step_count = len(flow_def.get("steps", []))
-            created_flows.append({"id": flow_id, "name": flow_def["name"], "steps": step_count})
-            print(f"  Created: {flow_id} ({step_count} steps)")
-        except Exception as e:
-            print(f"  Warning: Failed to create flow '{flow_def['name']}': {e}", file=sys.stderr)
+    # Create flows: resolve all steps against the shared ref index, split
+    # oversized flows, then create them concurrently in subflow order
+    diagram_id = created_diagram["id"] if created_diagram and created_diagram["id"] != "?" else None
+    jobs, flow_problems = resolve_flows(plan.get("flows", []), ref_to_id, diagram_id)
+    for problem in flow_problems:
+        print(f"  Warning: {problem}", file=sys.stderr)
+    jobs = [part for job in jobs for part in split_flow(job)]
+    created_flows, problems = push_flows(args.api_key, landscape_id, jobs, args.jobs)
+    for problem in problems:
+        if "creation failed" not in problem:
+            print(f"  Warning: {problem}", file=sys.stderr)
+    flow_problems += problems
 
     # Output summary
     print("\n=== Summary ===")
@@ -563,6 +810,7 @@ def main():
         "connections_created": created_connections,
         "diagram_created": created_diagram,
         "flows_created": created_flows,
+        "flow_problems": flow_problems,
         "ref_to_id_mapping": ref_to_id,
     }, indent=2))
 
@@ -0,0 +1,356 @@
+"""Persistent symbol/keyword index for topic-focused tracing.
+
+Indexes, per code file: definitions (functions, classes, methods), route
+strings (``@app.get("/pay")``, ``router.post('/pay')``, ``@PostMapping``,
+``HandleFunc("/pay")``, ``path("pay/")``...), event subscriptions and call
+sites. Identifiers are split into lowercase word terms and stored in an
+inverted index (term -> {file: weight}) that is saved between runs and
+updated incrementally: only files whose mtime or size changed are re-read.
+
+A topic query ("payment flow") ranks files by weighted term matches, lists
+the matching routes and definitions as entry points, and links modules into
+a call chain wherever a relevant file calls a symbol defined in another
+module's relevant files.
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+from pathlib import Path
+
+INDEX_VERSION = 2
+DEFAULT_INDEX_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "architecture-diagram-skill" / "symbols"
+MAX_FILE_BYTES = 1_000_000
+
+# Term weights by where the term was found.
+WEIGHT_ROUTE = 8
+WEIGHT_DEFINITION = 5
+WEIGHT_PATH = 3
+WEIGHT_CALL = 1
+
+# A call links two modules only if the callee is defined in at most this many
+# files tree-wide; generic names (get, run, handle) would link everything.
+SPECIFIC_SYMBOL_FILES = 3
+
+# Every pattern starts with a literal so the regex engine can skip ahead with
+# a substring search instead of trying each position; this keeps a cold
+# index of a large tree in seconds rather than minutes.
+DEFINITION_KEYWORDS = ("def", "function", "func", "fn", "class", "interface", "struct", "trait", "enum")
+DEFINITION_PATTERNS = [re.compile(kw + r"[ \t]+(?:\([^)\n]*\)[ \t]*)?(\w+)") for kw in DEFINITION_KEYWORDS] + [
+    re.compile(r"const[ \t]+(\w+)[ \t]*=[ \t]*(?:async[ \t]*)?(?:function\b|\([^)\n]*\)[ \t]*=>|\w+[ \t]*=>)"),
+] + [
+    re.compile(mod + r"[ \t]+[^\n(=;{}]*?(\w+)[ \t]*\(") for mod in ("public", "private", "protected")
+]
+# Matched against the reversed text: "  charge(amount) {" / "  charge(amount): T {" (class methods).
+REVERSED_METHOD_PATTERN = re.compile(r"\{[ \t]*(?:[\w<>\[\]|, ]*:[ \t]*)?\)[^()\n]*\((\w+)[ \t]*(?:cnysa[ \t]+)?\n")
+# Matched against the reversed text: "name(" -> "(eman".
+REVERSED_CALL_PATTERN = re.compile(r"\((\w{3,})")
+
+ROUTE_PATTERNS = [
+    # FastAPI / Flask / Starlette style decorators: @app.get("/x"), @router.route("/x")
+    ("route", re.compile(r"@\w+(?:\.\w+)*\.(get|post|put|patch|delete|route|api_route|websocket)\(\s*[\"']([^\"']*)", re.I)),
+    # Express / Koa / Hono style calls: app.get('/x', ...), router.post("/x")
+    ("route", re.compile(r"\.(get|post|put|patch|delete|all|use|route)\(\s*[\"'`](/[^\"'`]*)")),
+    # Spring: @GetMapping("/x"), @RequestMapping(value = "/x")
+    ("route", re.compile(r"@(Get|Post|Put|Patch|Delete|Request)Mapping\(\s*(?:(?:value|path)\s*=\s*)?[\"']([^\"']*)")),
+    # NestJS: @Controller('x'), @Post(':id')
+    ("route", re.compile(r"@(Controller|Get|Post|Put|Patch|Delete)\(\s*[\"']([^\"']*)")),
+    # Go net/http, gin, echo, chi: HandleFunc("/x"), r.GET("/x")
+    ("route", re.compile(r"\.(HandleFunc|Handle|GET|POST|PUT|PATCH|DELETE)\(\s*\"([^\"]+)\"")),
+    # Django urls: path("x/", view), re_path(r"^x/$", view)
+    ("route", re.compile(r"(path)\(\s*r?[\"']([^\"']*)[\"']\s*,")),
+    # Event handlers / consumers: .on("order.created"), .subscribe('x'), @EventPattern('x')
+    ("event", re.compile(r"\.(on|subscribe|consume|handle)\(\s*[\"']([\w.:\-/]+)[\"']")),
+    ("event", re.compile(r"@(EventPattern|MessagePattern|KafkaListener|RabbitListener|task|shared_task)\(\s*(?:topics\s*=\s*)?[\"']?([\w.:\-/]*)")),
+]
+
+IDENT_SPLIT = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+KEYWORDS = {
+    "if", "for", "while", "switch", "catch", "return", "function", "print", "super", "require",
+    "import", "typeof", "await", "async", "new", "class", "def", "elif", "else", "with", "assert",
+    "len", "str", "int", "dict", "list", "set", "tuple", "isinstance", "range", "get", "set", "map",
+    "filter", "then", "push", "append", "log", "console", "json", "string", "this", "self",
+}
+
+STOPWORDS = {
+    "the", "and", "for", "with", "flow", "process", "processing", "handling", "feature",
+    "diagram", "logic", "system", "service", "module",
+}
+
+
+def stem(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def terms_of(identifier: str) -> list[str]:
+    """Split an identifier or path into stemmed lowercase words of 3+ chars."""
+    return [stem(w.lower()) for w in IDENT_SPLIT.findall(identifier) if len(w) >= 3]
+
+
+def extract(text: str) -> dict:
+    """Extract definitions, routes and call names from source text."""
+    line_starts = [0]
+    for m in re.finditer("\n", text):
+        line_starts.append(m.end())
+
+    def line_of(pos: int) -> int:
+        lo, hi = 0, len(line_starts)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if line_starts[mid] <= pos:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    defs: dict[str, int] = {}
+    for pattern in DEFINITION_PATTERNS:
+        for m in pattern.finditer(text):
+            start = m.start()
+            if start and (text[start - 1].isalnum() or text[start - 1] in "_$."):
+                continue
+            name = m.group(1)
+            if name not in KEYWORDS and name not in defs and not name[0].isdigit():
+                defs[name] = line_of(m.start(1))
+    reversed_text = text[::-1]
+    end = len(text)
+    for m in REVERSED_METHOD_PATTERN.finditer(reversed_text):
+        name = m.group(1)[::-1]
+        if name not in KEYWORDS and name not in defs and not name[0].isdigit():
+            defs[name] = line_of(end - m.end(1))
+
+    routes = []
+    seen = set()
+    for kind, pattern in ROUTE_PATTERNS:
+        for m in pattern.finditer(text):
+            verb, target = m.group(1), m.group(2)
+            key = (verb.lower(), target, line_of(m.start()))
+            if key not in seen:
+                seen.add(key)
+                routes.append([kind, verb.upper() if kind == "route" else verb, target, key[2]])
+    routes.sort(key=lambda r: r[3])
+
+    calls = sorted({
+        c for c in (r[::-1] for r in REVERSED_CALL_PATTERN.findall(reversed_text))
+        if not c[0].isdigit() and c not in KEYWORDS and c not in defs
+    })
+    return {"defs": sorted(defs.items(), key=lambda d: d[1]), "routes": routes, "calls": calls}
+
+
+def file_terms(rel: str, info: dict) -> dict[str, int]:
+    weights: dict[str, int] = {}
+
+    def add(identifier: str, weight: int):
+        for term in terms_of(identifier):
+            if weights.get(term, 0) < weight:
+                weights[term] = weight
+
+    for call in info["calls"]:
+        add(call, WEIGHT_CALL)
+    add(rel, WEIGHT_PATH)
+    for name, _ in info["defs"]:
+        add(name, WEIGHT_DEFINITION)
+    for _, _, target, _ in info["routes"]:
+        add(target, WEIGHT_ROUTE)
+    return weights
+
+
+class SymbolIndex:
+    """Inverted index of one tree, persisted as JSON between runs."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.files: dict[str, dict] = {}
+        self.postings: dict[str, dict[str, int]] = {}
+        self.definitions: dict[str, dict[str, int]] = {}
+
+    @staticmethod
+    def default_path(root: Path) -> Path:
+        import hashlib
+        digest = hashlib.sha256(str(root).encode()).hexdigest()[:16]
+        return DEFAULT_INDEX_DIR / f"{root.name}-{digest}.json"
+
+    @classmethod
+    def load(cls, root: Path, index_file: Path | None = None) -> SymbolIndex:
+        index = cls(root)
+        path = index_file or cls.default_path(root)
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return index
+        if data.get("version") == INDEX_VERSION and data.get("root") == str(root):
+            index.files = data["files"]
+            index.postings = data["postings"]
+            index.definitions = data["definitions"]
+        return index
+
+    def save(self, index_file: Path | None = None):
+        from analyze_codebase import write_atomic
+        path = index_file or self.default_path(self.root)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"version": INDEX_VERSION, "root": str(self.root), "files": self.files,
+                "postings": self.postings, "definitions": self.definitions}
+        write_atomic(path, json.dumps(data, separators=(",", ":")))
+
+    def update(self, rels: list[str]) -> int:
+        """Bring the index in line with the given file list; return files re-read."""
+        current = set(rels)
+        for rel in [r for r in self.files if r not in current]:
+            self._remove(rel)
+        changed = 0
+        for rel in rels:
+            try:
+                st = os.stat(self.root / rel)
+            except OSError:
+                continue
+            entry = self.files.get(rel)
+            if entry and entry["m"] == st.st_mtime_ns and entry["s"] == st.st_size:
+                continue
+            if entry:
+                self._remove(rel)
+            info = {"defs": [], "routes": [], "calls": []}
+            if st.st_size <= MAX_FILE_BYTES:
+                try:
+                    with open(self.root / rel, encoding="utf-8", errors="ignore") as f:
+                        info = extract(f.read())
+                except OSError:
+                    pass
+            self.files[rel] = {"m": st.st_mtime_ns, "s": st.st_size, **info}
+            for term, weight in file_terms(rel, info).items():
+                self.postings.setdefault(term, {})[rel] = weight
+            for name, line in info["defs"]:
+                self.definitions.setdefault(name, {})[rel] = line
+            changed += 1
+        return changed
+
+    def _remove(self, rel: str):
+        entry = self.files.pop(rel)
+        for term in file_terms(rel, entry):
+            posting = self.postings.get(term)
+            if posting:
+                posting.pop(rel, None)
+                if not posting:
+                    del self.postings[term]
+        for name, _ in entry["defs"]:
+            defined = self.definitions.get(name)
+            if defined:
+                defined.pop(rel, None)
+                if not defined:
+                    del self.definitions[name]
+
+    def query(self, topic: str, module_of, limit: int = 20, imports=None) -> dict:
+        """Rank files, entry points and the module call chain for a topic.
+
+        module_of(rel) returns the owning module name or None; the optional
+        imports(rel) returns module names a file imports, adding import edges
+        from the ranked files to the chain.
+        """
+        words = [stem(w) for w in re.findall(r"[a-z0-9]+", topic.lower()) if w not in STOPWORDS]
+        query_terms = list(dict.fromkeys(t for w in words for t in terms_of(w)))
+        n_files = max(len(self.files), 1)
+
+        scores: dict[str, float] = {}
+        matched: dict[str, list[str]] = {}
+        for term in query_terms:
+            posting = self.postings.get(term, {})
+            if not posting:
+                continue
+            idf = math.log(1 + n_files / len(posting))
+            for rel, weight in posting.items():
+                scores[rel] = scores.get(rel, 0.0) + weight * idf
+                matched.setdefault(rel, []).append(term)
+        for rel in scores:
+            scores[rel] *= len(matched[rel])
+        ranked = sorted(scores, key=lambda r: (-scores[r], r))[:limit]
+
+        def relevant(name: str) -> bool:
+            return any(t in query_terms for t in terms_of(name))
+
+        entry_points = []
+        for rel in ranked:
+            entry = self.files[rel]
+            for kind, verb, target, line in entry["routes"]:
+                if relevant(target) or relevant(rel):
+                    entry_points.append({"file": rel, "line": line, "kind": kind, "method": verb,
+                                         "target": target, "module": module_of(rel)})
+            for name, line in entry["defs"]:
+                if relevant(name):
+                    entry_points.append({"file": rel, "line": line, "kind": "definition",
+                                         "target": name, "module": module_of(rel)})
+
+        module_scores: dict[str, float] = {}
+        for rel in ranked:
+            mod = module_of(rel)
+            if mod:
+                module_scores[mod] = module_scores.get(mod, 0.0) + scores[rel]
+
+        # Module edges: a relevant file calls a symbol defined in another module's relevant files.
+        defined_in: dict[str, set[str]] = {}
+        for rel in ranked:
+            mod = module_of(rel)
+            for name, _ in self.files[rel]["defs"]:
+                if mod:
+                    defined_in.setdefault(name, set()).add(mod)
+        edges: dict[tuple[str, str], set[str]] = {}
+        for rel in ranked:
+            origin = module_of(rel)
+            if not origin:
+                continue
+            for call in self.files[rel]["calls"]:
+                if len(self.definitions.get(call, ())) > SPECIFIC_SYMBOL_FILES:
+                    continue
+                for target in defined_in.get(call, ()):
+                    if target != origin:
+                        edges.setdefault((origin, target), set()).add(call)
+            for target in imports(rel) if imports else ():
+                if target != origin:
+                    edges.setdefault((origin, target), set()).add("import")
+
+        starts = [e["module"] for e in entry_points if e["kind"] != "definition" and e["module"]]
+        chain = _order_chain(list(dict.fromkeys(starts)), edges, module_scores)
+
+        return {
+            "topic": topic,
+            "terms": query_terms,
+            "files": [{"file": r, "module": module_of(r), "score": round(scores[r], 2),
+                       "matches": matched[r]} for r in ranked],
+            "entry_points": entry_points,
+            "modules": [{"name": m, "score": round(s, 2)}
+                        for m, s in sorted(module_scores.items(), key=lambda kv: -kv[1])],
+            "call_chain": [{"from": a, "to": b, "via": sorted(v)[:5]} for (a, b), v in sorted(edges.items())],
+            "chain": chain,
+        }
+
+
+def _order_chain(entries: list[str], edges: dict[tuple[str, str], set[str]], scores: dict[str, float]) -> list[str]:
+    """Breadth-first module order from the chain's sources, then the rest by score.
+
+    Sources are modules that call others but are called by none (the caller
+    side, e.g. a frontend); modules exposing matching routes come next.
+    """
+    out: dict[str, list[str]] = {}
+    incoming = {b for _, b in edges}
+    for a, b in edges:
+        out.setdefault(a, []).append(b)
+    by_score = sorted(scores, key=lambda m: -scores[m])
+    sources = [m for m in by_score if m in out and m not in incoming]
+    queue = list(dict.fromkeys(sources + entries)) or by_score[:1]
+    order: list[str] = []
+    seen = set()
+    while queue:
+        mod = queue.pop(0)
+        if mod in seen:
+            continue
+        seen.add(mod)
+        order.append(mod)
+        queue.extend(sorted(out.get(mod, []), key=lambda m: -scores.get(m, 0)))
+    order += [m for m in by_score if m not in seen]
+    return order
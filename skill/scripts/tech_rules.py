@@ -0,0 +1,146 @@
+"""Indexed technology detection rules for analyze_codebase.py.
+
+Rules live in tech_rules.json (one entry per technology). Loading compiles
+them into lookup structures so matching cost does not grow with the rule set:
+
+- packages: exact dependency names          -> dict
+- scopes:   npm scopes / Maven groupIds      -> dict keyed by the name's scope
+- prefixes: dependency name prefixes         -> character trie
+- files:    path suffixes (``prisma/schema.prisma``) -> dict keyed by basename;
+            basename globs (``docker-compose*.yml``) are checked per file name
+- images:   container image names            -> dict (tag and registry stripped)
+
+Python dependency names are compared PEP 503-normalized; everything else is
+compared case-insensitively.
+"""
+from __future__ import annotations
+
+import json
+import re
+from fnmatch import fnmatchcase as fnmatch
+from pathlib import Path
+
+DEFAULT_RULES_FILE = Path(__file__).with_name("tech_rules.json")
+
+_TERMINAL = ""  # trie key holding the rules that end at a node
+
+
+class Rule:
+    __slots__ = ("name", "type", "c4_type")
+
+    def __init__(self, name: str, type: str, c4_type: str):
+        self.name = name
+        self.type = type
+        self.c4_type = c4_type
+
+
+class RuleEngine:
+    """Compiled rule set; build with ``RuleEngine.load()``."""
+
+    def __init__(self, rules: list[dict]):
+        self.rules: list[Rule] = []
+        self.packages: dict[str, list[Rule]] = {}
+        self.scopes: dict[str, list[Rule]] = {}
+        self.prefixes: dict = {}
+        self.files: dict[str, list[tuple[str, Rule]]] = {}
+        self.file_globs: list[tuple[str, Rule]] = []
+        self.images: dict[str, list[Rule]] = {}
+        for spec in rules:
+            self.add(spec)
+
+    @classmethod
+    def load(cls, path: Path | str | None = None) -> RuleEngine:
+        with open(path or DEFAULT_RULES_FILE) as f:
+            data = json.load(f)
+        return cls(data.get("rules", []))
+
+    def add(self, spec: dict):
+        rule = Rule(spec["name"], spec["type"], spec["c4_type"])
+        self.rules.append(rule)
+        for name in spec.get("packages", []):
+            self.packages.setdefault(_normalize(name), []).append(rule)
+        for scope in spec.get("scopes", []):
+            self.scopes.setdefault(scope.lower(), []).append(rule)
+        for prefix in spec.get("prefixes", []):
+            node = self.prefixes
+            for ch in prefix.lower():
+                node = node.setdefault(ch, {})
+            node.setdefault(_TERMINAL, []).append(rule)
+        for pattern in spec.get("files", []):
+            if "*" in pattern:
+                self.file_globs.append((pattern, rule))
+                continue
+            basename = pattern.rpartition("/")[2]
+            self.files.setdefault(basename, []).append((pattern, rule))
+        for image in spec.get("images", []):
+            self.images.setdefault(image.lower(), []).append(rule)
+
+    def match_dependency(self, name: str) -> list[Rule]:
+        """Rules matching a dependency name (exact, scope, then prefix)."""
+        key = _normalize(name)
+        found = list(self.packages.get(key, ()))
+        scope = _scope(key)
+        if scope:
+            found += self.scopes.get(scope, ())
+        node = self.prefixes
+        for ch in key:
+            node = node.get(ch)
+            if node is None:
+                break
+            found += node.get(_TERMINAL, ())
+        return found
+
+    def may_match_file(self, basename: str) -> bool:
+        """Cheap pre-check so callers can skip most file names."""
+        return basename in self.files or any(fnmatch(basename, g) for g, _ in self.file_globs)
+
+    def match_file(self, rel: str) -> list[Rule]:
+        """Rules whose file signature is a suffix (or basename glob) of the relative path."""
+        basename = rel.rpartition("/")[2]
+        found = [
+            rule for pattern, rule in self.files.get(basename, ())
+            if rel == pattern or rel.endswith("/" + pattern)
+        ]
+        found += [rule for pattern, rule in self.file_globs if fnmatch(basename, pattern)]
+        return found
+
+    def match_image(self, image: str) -> list[Rule]:
+        """Rules for a container image reference like ``docker.io/library/postgres:16``."""
+        name = image.lower().split("@", 1)[0]
+        last = name.rpartition("/")[2]
+        if ":" in last:
+            name = name[: len(name) - len(last)] + last.split(":", 1)[0]
+        for candidate in (name, name.removeprefix("docker.io/").removeprefix("library/"),
+                          name.removeprefix("docker.io/library/")):
+            if candidate in self.images:
+                return list(self.images[candidate])
+        return []
+
+
+def _normalize(name: str) -> str:
+    name = name.strip().lower()
+    if "/" in name or ":" in name or name.startswith("@"):
+        return name
+    return re.sub(r"[-_.]+", "-", name)
+
+
+def _scope(name: str) -> str | None:
+    """npm scope (``@nestjs``) or Maven groupId (``org.springframework.boot``)."""
+    if name.startswith("@") and "/" in name:
+        return name.split("/", 1)[0]
+    if ":" in name:
+        return name.split(":", 1)[0]
+    return None
+
+
+COMPOSE_IMAGE = re.compile(r"""^\s*image:\s*["']?([^"'\s#]+)""", re.M)
+
+
+def compose_images(text: str) -> list[str]:
+    """Image references from a docker-compose file (no YAML parser needed)."""
+    return COMPOSE_IMAGE.findall(text)
+
+
+def is_compose_file(filename: str) -> bool:
+    return (filename.startswith(("docker-compose", "compose"))
+            and filename.endswith((".yml", ".yaml")))